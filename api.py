@@ -0,0 +1,352 @@
+"""JSON API mirroring the venue, artist and show pages.
+
+List endpoints use opaque cursor pagination (`?cursor=`, `?limit=`) and
+every read endpoint accepts `?fields=a,b` so only the requested columns
+are selected.
+
+Venues and artists can be edited with PATCH (bearer token required; see
+auth.py). `PATCH /api/venues/<id>` takes the changed fields plus the
+`version` last read, and answers 409 if the row has moved on since.
+`PATCH /api/venues` takes {"where": {...listing filters}, "set": {...}}
+and updates every matching row in one statement.
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from flask import Blueprint, abort, current_app, jsonify, request
+from flask.json.provider import DefaultJSONProvider
+import orjson
+from auth import token_required
+from facets import listing_filters
+from forms import csrf
+from models import db, Venue, Artist, Show
+from queries import artist_details, venue_details
+import updates
+
+api = Blueprint("api", __name__, url_prefix="/api")
+
+VENUE_COLUMNS = {
+    name: getattr(Venue, name)
+    for name in (
+        "id",
+        "name",
+        "genres",
+        "address",
+        "city",
+        "state",
+        "phone",
+        "website",
+        "facebook_link",
+        "seeking_talent",
+        "seeking_description",
+        "image_link",
+        "upcoming_shows_count",
+        "past_shows_count",
+        "version",
+    )
+}
+ARTIST_COLUMNS = {
+    name: getattr(Artist, name)
+    for name in (
+        "id",
+        "name",
+        "genres",
+        "city",
+        "state",
+        "phone",
+        "website",
+        "facebook_link",
+        "seeking_venue",
+        "seeking_description",
+        "image_link",
+        "upcoming_shows_count",
+        "past_shows_count",
+        "version",
+    )
+}
+SHOW_COLUMNS = {
+    "id": Show.id,
+    "start_time": Show.start_time,
+    "end_time": Show.end_time,
+    "venue_id": Show.venue_id,
+    "venue_name": Venue.name,
+    "venue_image_link": Venue.image_link,
+    "artist_id": Show.artist_id,
+    "artist_name": Artist.name,
+    "artist_image_link": Artist.image_link,
+}
+# Keys only available from the detail dicts built for the HTML pages.
+DETAIL_KEYS = ("past_shows", "upcoming_shows")
+
+DEFAULT_LIST_FIELDS = ("id", "name", "city", "state")
+
+
+# ----------------------------------------------------------------------------#
+# Serialization.
+# ----------------------------------------------------------------------------#
+
+
+def _default(o):
+    if isinstance(o, (date, datetime)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Compact JSON with ISO 8601 datetimes, encoded by orjson."""
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, default=_default)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, types):
+    """The values encoded in `cursor`, one of each of `types`, or abort 400."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        abort(400, "Invalid cursor.")
+    if (
+        not isinstance(values, list)
+        or len(values) != len(types)
+        # bool is an int subclass, but never a valid id.
+        or not all(
+            isinstance(value, kind) and not isinstance(value, bool)
+            for value, kind in zip(values, types)
+        )
+    ):
+        abort(400, "Invalid cursor.")
+    return values
+
+
+# ----------------------------------------------------------------------------#
+# Helpers.
+# ----------------------------------------------------------------------------#
+
+
+def requested_fields(available, default):
+    """Field names from `?fields=`, validated against `available`."""
+    fields = request.args.get("fields")
+    if not fields:
+        return list(default)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(available))
+    if unknown:
+        abort(400, f"Unknown fields: {', '.join(unknown)}.")
+    return names
+
+
+def page_limit():
+    limit = request.args.get("limit", current_app.config["API_PAGE_SIZE"], type=int)
+    return max(1, min(limit, current_app.config["API_MAX_PAGE_SIZE"]))
+
+
+def select(fields, required=()):
+    """Names to select: the requested fields plus any the query needs."""
+    return list(dict.fromkeys((*required, *fields)))
+
+
+def page(query, names, fields, limit, cursor_keys):
+    rows = query.limit(limit + 1).all()
+    rows = [dict(zip(names, row)) for row in rows]
+    data = [{name: row[name] for name in fields} for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor([rows[limit - 1][key] for key in cursor_keys])
+    return jsonify({"data": data, "next_cursor": next_cursor})
+
+
+def list_by_id(model, columns):
+    fields = requested_fields(columns, DEFAULT_LIST_FIELDS)
+    names = select(fields, required=("id",))
+    query = db.session.query(*(columns[name] for name in names)).order_by(model.id)
+    if "cursor" in request.args:
+        (after,) = decode_cursor(request.args["cursor"], (int,))
+        query = query.filter(model.id > after)
+    return page(query, names, fields, page_limit(), ("id",))
+
+
+def show_query(names):
+    # Both parents are always joined, so the shows of soft-deleted venues
+    # and artists drop out (see deletion.py). Joined along the foreign keys:
+    # with_loader_criteria doesn't add its filter to an explicit ON clause.
+    return (
+        db.session.query(*(SHOW_COLUMNS[name] for name in names))
+        .select_from(Show)
+        .join(Venue)
+        .join(Artist)
+    )
+
+
+def detail(model, columns, details, id):
+    fields = requested_fields((*columns, *DETAIL_KEYS), ())
+    if fields and all(name in columns for name in fields):
+        row = (
+            db.session.query(*(columns[name] for name in fields))
+            .filter(model.id == id)
+            .first()
+        )
+        if row is None:
+            abort(404)
+        return jsonify(dict(zip(fields, row)))
+    data = details(id)
+    if data is None:
+        abort(404)
+    if fields:
+        data = {name: data[name] for name in fields if name in data}
+    return jsonify(data)
+
+
+def json_body():
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        abort(400, "Expected a JSON object.")
+    return body
+
+
+def clean_changes(model, data):
+    if not isinstance(data, dict):
+        abort(400, "Expected an object of fields to set.")
+    try:
+        return updates.clean_changes(model, data)
+    except ValueError as e:
+        abort(400, str(e))
+
+
+def patch(model, columns, id):
+    body = json_body()
+    version = body.pop("version", None)
+    if type(version) is not int:
+        abort(400, "The version being edited is required.")
+    try:
+        row = updates.update(model, id, version, clean_changes(model, body))
+    except updates.Conflict as e:
+        abort(409, f"Edited by someone else; version {e.version} is current.")
+    if row is None:
+        abort(404)
+    return jsonify({name: row[name] for name in columns})
+
+
+def bulk_patch(model):
+    body = json_body()
+    where = body.get("where")
+    if not isinstance(where, dict) or not where:
+        abort(400, "where must hold at least one filter.")
+    where = {name: str(value) for name, value in where.items()}
+    filters, active = listing_filters(model, where)
+    unknown = sorted(set(where) - set(active))
+    if unknown:
+        abort(400, f"Unknown filters: {', '.join(unknown)}.")
+    rows = updates.update_where(model, filters, clean_changes(model, body.get("set")))
+    return jsonify(
+        {
+            "updated": len(rows),
+            "data": [{"id": id, "version": version} for id, version in rows],
+        }
+    )
+
+
+# ----------------------------------------------------------------------------#
+# Endpoints.
+# ----------------------------------------------------------------------------#
+
+
+@api.route("/venues")
+def list_venues():
+    return list_by_id(Venue, VENUE_COLUMNS)
+
+
+@api.route("/venues/<int:venue_id>")
+def get_venue(venue_id):
+    return detail(Venue, VENUE_COLUMNS, venue_details, venue_id)
+
+
+@api.route("/venues", methods=["PATCH"])
+@token_required
+def patch_venues():
+    return bulk_patch(Venue)
+
+
+@api.route("/venues/<int:venue_id>", methods=["PATCH"])
+@token_required
+def patch_venue(venue_id):
+    return patch(Venue, VENUE_COLUMNS, venue_id)
+
+
+@api.route("/artists")
+def list_artists():
+    return list_by_id(Artist, ARTIST_COLUMNS)
+
+
+@api.route("/artists/<int:artist_id>")
+def get_artist(artist_id):
+    return detail(Artist, ARTIST_COLUMNS, artist_details, artist_id)
+
+
+@api.route("/artists", methods=["PATCH"])
+@token_required
+def patch_artists():
+    return bulk_patch(Artist)
+
+
+@api.route("/artists/<int:artist_id>", methods=["PATCH"])
+@token_required
+def patch_artist(artist_id):
+    return patch(Artist, ARTIST_COLUMNS, artist_id)
+
+
+@api.route("/shows")
+def list_shows():
+    fields = requested_fields(
+        SHOW_COLUMNS, ("id", "start_time", "end_time", "venue_id", "artist_id")
+    )
+    names = select(fields, required=("start_time", "id"))
+    query = show_query(names).order_by(Show.start_time, Show.id)
+    if "cursor" in request.args:
+        after, after_id = decode_cursor(request.args["cursor"], (str, int))
+        try:
+            after = datetime.fromisoformat(after)
+        except ValueError:
+            abort(400, "Invalid cursor.")
+        query = query.filter(
+            db.tuple_(Show.start_time, Show.id) > db.tuple_(after, after_id)
+        )
+    return page(query, names, fields, page_limit(), ("start_time", "id"))
+
+
+@api.route("/shows/<int:show_id>")
+def get_show(show_id):
+    fields = requested_fields(SHOW_COLUMNS, SHOW_COLUMNS)
+    row = show_query(fields).filter(Show.id == show_id).first()
+    if row is None:
+        abort(404)
+    return jsonify(dict(zip(fields, row)))
+
+
+def api_error(error):
+    return jsonify({"error": error.description}), error.code
+
+
+# Registered per status code so they win over the app's HTML handlers.
+for code in (400, 401, 404, 405, 409):
+    api.register_error_handler(code, api_error)
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
+    # Writes authenticate with a bearer token, not a session cookie.
+    csrf.exempt(api)
+    app.register_blueprint(api)
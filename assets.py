@@ -0,0 +1,148 @@
+"""Fingerprinted, precompressed static assets.
+
+`flask assets build` copies every file under `static/` to
+`ASSET_BUILD_DIR` with a content hash in its name (`css/main.css` becomes
+`css/main.1a2b3c4d5e6f.css`), rewrites `url()` references in stylesheets
+to the hashed names, and stores a gzip variant next to each text asset.
+The mapping is written to `manifest.json` there.
+
+Templates link assets with `asset_url("css/main.css")`. Once a manifest
+exists it resolves to `/assets/<hashed name>`, served with a year-long
+immutable Cache-Control header and the `.gz` variant when the client
+accepts gzip. Without a manifest (e.g. in development) it falls back to
+the plain `/static/` URL.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import click
+from flask import Blueprint, abort, current_app, request, send_from_directory, url_for
+from flask.cli import AppGroup, with_appcontext
+
+assets = Blueprint("assets", __name__, url_prefix="/assets")
+assets_cli = AppGroup("assets", help="Build fingerprinted static assets.")
+
+MANIFEST = "manifest.json"
+COMPRESSIBLE = frozenset((".css", ".js", ".map", ".svg", ".eot", ".ttf", ".otf"))
+CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_manifest = {}
+
+
+def fingerprint(path, content):
+    root, ext = posixpath.splitext(path)
+    return f"{root}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+
+
+def rewrite_css(path, content, manifest):
+    """Point relative url() references in a stylesheet at hashed names."""
+
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(("data:", "http:", "https:", "//", "/")):
+            return match.group(0)
+        target, suffix = re.match(r"([^?#]*)(.*)", url).groups()
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+        if resolved not in manifest:
+            return match.group(0)
+        hashed = posixpath.relpath(manifest[resolved], posixpath.dirname(path))
+        return f"url({quote}{hashed}{suffix}{quote})"
+
+    return CSS_URL.sub(replace, content.decode("utf-8")).encode("utf-8")
+
+
+def build(source, output):
+    """Build `source` into `output`; returns the manifest."""
+    paths = []
+    for directory, dirs, files in os.walk(source):
+        dirs[:] = [
+            d for d in dirs if os.path.join(directory, d) != os.path.normpath(output)
+        ]
+        for name in files:
+            if not name.startswith("."):
+                full = os.path.join(directory, name)
+                paths.append(os.path.relpath(full, source).replace(os.sep, "/"))
+    # Stylesheets last, so the files they reference are already hashed.
+    paths.sort(key=lambda path: (path.endswith(".css"), path))
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    manifest = {}
+    for path in paths:
+        with open(os.path.join(source, path), "rb") as f:
+            content = f.read()
+        if path.endswith(".css"):
+            content = rewrite_css(path, content, manifest)
+        manifest[path] = fingerprint(path, content)
+        target = os.path.join(output, manifest[path])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(content)
+        if posixpath.splitext(path)[1] in COMPRESSIBLE:
+            compressed = gzip.compress(content, compresslevel=9, mtime=0)
+            if len(compressed) < len(content):
+                with open(target + ".gz", "wb") as f:
+                    f.write(compressed)
+    with open(os.path.join(output, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(app):
+    try:
+        with open(os.path.join(app.config["ASSET_BUILD_DIR"], MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(path):
+    if path in _manifest:
+        return url_for("assets.serve", filename=_manifest[path])
+    return url_for("static", filename=path)
+
+
+@assets.route("/<path:filename>")
+def serve(filename):
+    directory = current_app.config["ASSET_BUILD_DIR"]
+    if filename == MANIFEST:
+        abort(404)
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    gzipped = os.path.isfile(os.path.join(directory, filename + ".gz"))
+    if gzipped and request.accept_encodings["gzip"]:
+        response = send_from_directory(
+            directory, filename + ".gz", mimetype=mimetype, max_age=None
+        )
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = send_from_directory(
+            directory, filename, mimetype=mimetype, max_age=None
+        )
+    if gzipped:
+        response.vary.add("Accept-Encoding")
+    # Hashed names change with their content, so they never need revalidating.
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
+
+@assets_cli.command("build")
+@with_appcontext
+def build_command():
+    """Fingerprint and precompress static/ into ASSET_BUILD_DIR."""
+    output = current_app.config["ASSET_BUILD_DIR"]
+    manifest = build(current_app.static_folder, output)
+    click.echo(f"Built {len(manifest)} assets into {output}.")
+
+
+def init_app(app):
+    global _manifest
+    _manifest = load_manifest(app)
+    app.add_template_global(asset_url)
+    app.register_blueprint(assets)
+    app.cli.add_command(assets_cli)
@@ -0,0 +1,97 @@
+"""Concurrent reads for the read-only pages.
+
+A page that needs several independent queries (a venue and its shows, a
+listing and its facet counts, a search page and its total) hands them to
+`gather()`. With `ASYNC_READS` enabled they run at the same time, each on
+its own connection from an asyncpg pool, so the page waits for the
+slowest query rather than the sum of all of them. Otherwise, or outside
+Postgres, they run one after another on `db.session`, so both modes
+return the same rows. Writes always use the sync session.
+
+The async engine lives on one event loop per process, run in a
+background thread that the request threads submit to. Flask runs async
+views on a fresh event loop per request, which cannot keep a connection
+pool between requests. The loop and engine start on first use in each
+process, so workers forked with --preload get their own.
+
+`run_coroutine_threadsafe` schedules the queries in a copy of the calling
+thread's context, which holds Flask's request context, so instrumentation
+counts and times them against the request that asked for them.
+"""
+
+import asyncio
+import os
+import threading
+from flask import current_app
+from sqlalchemy.engine import make_url
+from models import db
+
+try:
+    import asyncpg
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+except ImportError:  # optional dependency
+    asyncpg = None
+
+
+class AsyncReader:
+    def __init__(self, url, pool_size, max_overflow):
+        self.url = make_url(url).set(drivername="postgresql+asyncpg")
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def start(self):
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=self.loop.run_forever, name="async-reads", daemon=True
+            ).start()
+            self.engine = create_async_engine(
+                self.url,
+                pool_size=self.pool_size,
+                max_overflow=self.max_overflow,
+                pool_pre_ping=True,
+            )
+            self.pid = os.getpid()
+
+    async def execute(self, statement):
+        # Sessions, not bare connections, so ORM events such as the
+        # soft-delete filter in `deletion` still apply.
+        async with AsyncSession(self.engine) as session:
+            return (await session.execute(statement)).all()
+
+    async def execute_all(self, statements):
+        return await asyncio.gather(*(self.execute(s) for s in statements))
+
+    def gather(self, statements):
+        if self.pid != os.getpid():
+            self.start()
+        return asyncio.run_coroutine_threadsafe(
+            self.execute_all(statements), self.loop
+        ).result()
+
+
+def gather(*statements):
+    """Rows of each of `statements`, run concurrently when enabled."""
+    reader = current_app.extensions.get("async_reads")
+    if reader is None:
+        return [db.session.execute(statement).all() for statement in statements]
+    return reader.gather(statements)
+
+
+def init_app(app):
+    if not app.config["ASYNC_READS"]:
+        return
+    url = app.config["SQLALCHEMY_DATABASE_URI"]
+    if make_url(url).get_backend_name() != "postgresql":
+        return
+    if asyncpg is None:
+        raise RuntimeError("ASYNC_READS requires the asyncpg package")
+    app.extensions["async_reads"] = AsyncReader(
+        url,
+        app.config["ASYNC_POOL_SIZE"],
+        app.config["ASYNC_MAX_OVERFLOW"],
+    )
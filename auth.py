@@ -0,0 +1,21 @@
+import hmac
+from functools import wraps
+from flask import abort, current_app, request
+
+# ----------------------------------------------------------------------------#
+# Token authentication for machine clients.
+# ----------------------------------------------------------------------------#
+
+
+def token_required(view):
+    """Require `Authorization: Bearer <API_TOKEN>`; refuse all if unset."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = current_app.config["API_TOKEN"]
+        supplied = request.headers.get("Authorization", "")
+        if not token or not hmac.compare_digest(supplied, f"Bearer {token}"):
+            abort(401)
+        return view(*args, **kwargs)
+
+    return wrapper
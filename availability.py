@@ -0,0 +1,101 @@
+"""Busy and free intervals of a venue, served by `/venues/<id>/calendar`.
+
+Each calendar month is read with one range query on the
+(venue_id, start_time) index, merged into disjoint busy intervals and
+cached. A request stitches the cached months together and clips them to
+its window. Free intervals are the gaps in between. Creating or deleting a
+show drops the cached months it touches, via `invalidate`.
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from models import db, Show
+import cache
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1)
+
+
+def next_month(month):
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months(start, end):
+    """First instants of the calendar months overlapping [start, end)."""
+    month = month_start(start)
+    while month < end:
+        yield month
+        month = next_month(month)
+
+
+def merge(intervals):
+    """Merges sorted (start, end) pairs into disjoint ones.
+
+    Intervals that touch are joined, so back-to-back shows read as one
+    busy stretch.
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def busy_in_month(venue_id, month):
+    """Merged bookings of a venue, clipped to one month; cached."""
+    key = cache.calendar_key(venue_id, month)
+    busy = cache.get(key)
+    if busy is None:
+        end = next_month(month)
+        # Shows last at most SHOW_MAX_HOURS, so one that reaches into this
+        # month starts no earlier than that before it.
+        earliest = month - timedelta(hours=current_app.config["SHOW_MAX_HOURS"])
+        rows = (
+            db.session.query(Show.start_time, Show.end_time)
+            .filter(
+                Show.venue_id == venue_id,
+                Show.start_time > earliest,
+                Show.start_time < end,
+                Show.end_time > month,
+            )
+            .order_by(Show.start_time)
+        )
+        busy = merge((max(s, month), min(e, end)) for s, e in rows)
+        cache.set(key, busy, ttl=current_app.config["CALENDAR_CACHE_TTL"])
+    return busy
+
+
+def calendar(venue_id, start, end):
+    """Returns (busy, free) lists of (start, end) pairs covering [start, end)."""
+    busy = []
+    for interval in merge(
+        interval
+        for month in months(start, end)
+        for interval in busy_in_month(venue_id, month)
+    ):
+        if interval[1] > start and interval[0] < end:
+            busy.append((max(interval[0], start), min(interval[1], end)))
+    free = []
+    cursor = start
+    for busy_start, busy_end in busy:
+        if busy_start > cursor:
+            free.append((cursor, busy_start))
+        cursor = busy_end
+    if cursor < end:
+        free.append((cursor, end))
+    return busy, free
+
+
+def invalidate(bookings):
+    """Drops the cached months touched by (venue_id, start, end) bookings."""
+    cache.delete(
+        *{
+            cache.calendar_key(venue_id, month)
+            for venue_id, start, end in bookings
+            for month in months(start, end)
+        }
+    )
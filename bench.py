@@ -0,0 +1,225 @@
+"""End-to-end load benchmark of every route.
+
+Drives each GET route, plus the search forms and a few filtered listings,
+through the Flask test client against the configured database; fill it
+with `flask seed` first. Routes taking an id get the busiest venue or
+artist. For each route it reports p50/p95/p99 latency, throughput, the
+response size (so e.g. /api/venues/<id> compares with /venues/<id>) and the
+SQL statements per request (from the `Server-Timing` header), along with
+`bench_startup.py`'s worker start-up times, and writes them as JSON:
+
+    flask seed --seed 1
+    python bench.py --output bench-baseline.json
+    python bench.py --baseline bench-baseline.json --max-regression 25
+
+With --baseline it exits non-zero when a route's p95 is more than
+--max-regression percent (and --min-delta-ms) slower than the baseline's,
+when it runs more SQL statements than before, or when it fails. A missing
+baseline file is written from this run, so the first run on a machine
+records the timings later ones are held to.
+Streamed responses (the export) send that header before running most of
+their queries, so their count is a lower bound.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func
+from app import create_app
+from models import db, Venue, Artist, Show
+import bench_startup
+
+# Not benchmarked: static files, and routes that write (POST/PATCH).
+SKIPPED_ENDPOINTS = frozenset(("static", "assets.serve"))
+# Query string arguments, from samples(), that routes can't answer without.
+QUERY_ARGUMENTS = {"views.venues_nearby": {"lat", "lon"}}
+QUERY_COUNT = re.compile(r'desc="(\d+) queries"')
+TOKEN = "bench"
+
+
+def samples(app):
+    """Values for the URL arguments of the routes under test."""
+    with app.app_context():
+        venue = db.session.query(Venue).order_by(Venue.upcoming_shows_count.desc())
+        artist = db.session.query(Artist).order_by(Artist.upcoming_shows_count.desc())
+        venue, artist = venue.first(), artist.first()
+        show_id = db.session.query(func.max(Show.id)).scalar()
+    if venue is None or artist is None or show_id is None:
+        sys.exit("No data to benchmark against; run `flask seed` first.")
+    values = {
+        "venue_id": venue.id,
+        "artist_id": artist.id,
+        "show_id": show_id,
+        "table": "shows",
+        "format": "jsonl",
+        # For the filtered listings and searches below.
+        "state": venue.state,
+        "genre": venue.genres[0],
+        "term": venue.name.split()[0],
+    }
+    # Around the venue, for /venues/nearby; not set for venues never located.
+    if venue.latitude is not None:
+        values.update(lat=venue.latitude, lon=venue.longitude)
+    return values
+
+
+def cases(app, values):
+    """(name, method, path, form data) per request to time, and the GET
+    routes that could not be covered."""
+    urls = app.url_map.bind("localhost")
+    found, uncovered = [], []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint in SKIPPED_ENDPOINTS or "GET" not in rule.methods:
+            continue
+        needed = rule.arguments | QUERY_ARGUMENTS.get(rule.endpoint, set())
+        if not needed <= values.keys():
+            uncovered.append(rule.rule)
+            continue
+        # Those not in the rule go into the query string.
+        arguments = {name: values[name] for name in needed}
+        path = urls.build(rule.endpoint, arguments, method="GET")
+        found.append((f"GET {rule.rule}", "GET", path, None))
+    search = {"search_term": values["term"]}
+    found += [
+        ("POST /venues/search", "POST", "/venues/search", search),
+        ("POST /artists/search", "POST", "/artists/search", search),
+        ("GET /venues?state=", "GET", f"/venues?state={values['state']}", None),
+        ("GET /artists?genre=", "GET", f"/artists?genre={values['genre']}", None),
+    ]
+    return found, uncovered
+
+
+def timed_request(client, method, path, data):
+    started = time.perf_counter()
+    response = client.open(
+        path, method=method, data=data, headers={"Authorization": f"Bearer {TOKEN}"}
+    )
+    size = len(response.get_data())  # reads streamed bodies to the end
+    elapsed = time.perf_counter() - started
+    match = QUERY_COUNT.search(response.headers.get("Server-Timing", ""))
+    queries = int(match.group(1)) if match else None
+    return response.status_code, elapsed, queries, size
+
+
+def run(app, case, requests, warmup, concurrency):
+    name, method, path, data = case
+    client = app.test_client()
+    for _ in range(warmup):
+        timed_request(client, method, path, data)
+    started = time.perf_counter()
+    if concurrency == 1:
+        results = [timed_request(client, method, path, data) for _ in range(requests)]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            results = list(
+                pool.map(
+                    lambda _: timed_request(app.test_client(), method, path, data),
+                    range(requests),
+                )
+            )
+    wall = time.perf_counter() - started
+    statuses, latencies, queries, sizes = zip(*results)
+    latencies = [elapsed * 1000 for elapsed in latencies]
+    queries = [count for count in queries if count is not None]
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "path": path,
+        "errors": sum(status >= 400 for status in statuses),
+        "p50_ms": round(percentiles[49], 2),
+        "p95_ms": round(percentiles[94], 2),
+        "p99_ms": round(percentiles[98], 2),
+        "throughput_rps": round(requests / wall, 1),
+        "bytes": int(statistics.median(sizes)),
+        "queries_p50": statistics.median(queries) if queries else None,
+        "queries_max": max(queries) if queries else None,
+    }
+
+
+def slower(now, before, max_regression, min_delta_ms):
+    return now - before > min_delta_ms and now > before * (1 + max_regression / 100)
+
+
+def regressions(result, baseline, max_regression, min_delta_ms):
+    found = []
+    for name, route in result["routes"].items():
+        if route["errors"]:
+            found.append(f"{name}: {route['errors']} failed requests")
+        before = baseline["routes"].get(name)
+        if before is None:
+            continue
+        if slower(route["p95_ms"], before["p95_ms"], max_regression, min_delta_ms):
+            found.append(f"{name}: p95 {before['p95_ms']} -> {route['p95_ms']} ms")
+        if (route["queries_max"] or 0) > (before["queries_max"] or 0):
+            found.append(
+                f"{name}: {before['queries_max']} -> {route['queries_max']} queries"
+            )
+    for phase, ms in result.get("startup", {}).items():
+        before = baseline.get("startup", {}).get(phase)
+        if before is not None and slower(ms, before, max_regression, min_delta_ms):
+            found.append(f"startup {phase}: {before} -> {ms} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="Per route.")
+    parser.add_argument("--warmup", type=int, default=5, help="Per route, untimed.")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--route", action="append", help="Only routes whose name contains this."
+    )
+    parser.add_argument(
+        "--startup-runs", type=int, default=5, help="0 skips start-up timing."
+    )
+    parser.add_argument("--output", help="Write the results here as JSON.")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare.")
+    parser.add_argument("--max-regression", type=float, default=25.0, help="Percent.")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    app = create_app()
+    app.config.update(WTF_CSRF_ENABLED=False, API_TOKEN=TOKEN)
+    found, uncovered = cases(app, samples(app))
+    if args.route:
+        found = [case for case in found if any(r in case[0] for r in args.route)]
+    result = {"requests": args.requests, "concurrency": args.concurrency, "routes": {}}
+    for case in found:
+        route = run(app, case, args.requests, args.warmup, args.concurrency)
+        result["routes"][case[0]] = route
+        print(
+            f"{case[0]:<40} p50 {route['p50_ms']:>8} p95 {route['p95_ms']:>8} "
+            f"p99 {route['p99_ms']:>8} ms {route['throughput_rps']:>8} req/s "
+            f"{route['bytes']:>8} B {route['queries_max']} queries",
+            file=sys.stderr,
+        )
+    result["uncovered"] = uncovered
+    if args.startup_runs:
+        result["startup"] = bench_startup.measure(args.startup_runs)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    baseline = {"routes": {}}
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    elif args.baseline:
+        with open(args.baseline, "w") as f:
+            f.write(output + "\n")
+        print(
+            f"No baseline yet; recorded this run as {args.baseline}.", file=sys.stderr
+        )
+    found = regressions(result, baseline, args.max_regression, args.min_delta_ms)
+    if found:
+        sys.exit("Regressions:\n  " + "\n  ".join(found))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Benchmark the show queries that partitioning by month should prune.
+
+`fill` generates shows straight in SQL, far faster than `flask seed` at
+tens of millions of rows: every venue plays one evening show a day, with
+the artists rotated day by day so nobody is double-booked. 50M shows are
+about 68,500 venues (and at least as many artists) over ±365 days:
+
+    flask seed --venues 68500 --artists 68500 --shows 0
+    python bench_partitions.py fill --days 365
+    python bench_partitions.py run --output before.json
+    flask db upgrade
+    python bench_partitions.py run --baseline before.json --output after.json
+
+`run` explains and times, with EXPLAIN ANALYZE, the statements behind
+the busiest venue's shows, a booking check, a calendar
+month, the counters rollover and the first /shows page. For each it
+reports the median execution time and how many shows tables (the table,
+or its partitions) the plan includes and actually reads. Postgres only.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, text
+from app import create_app
+from availability import month_start, next_month
+from models import db, Venue, Artist, Show
+from queries import show_statement
+import counters
+
+
+def fill(days):
+    if db.session.query(Show.id).first() is not None:
+        sys.exit("Shows already exist; fill an empty scratch database.")
+    venues = db.session.query(func.count(Venue.id)).scalar()
+    artists = db.session.query(func.count(Artist.id)).scalar()
+    if not venues or artists < venues:
+        sys.exit("Needs venues and at least as many artists; run `flask seed`.")
+    today = datetime.combine(datetime.today(), datetime.min.time())
+    for day in range(-days, days + 1):
+        # One day per statement keeps transactions and WAL bursts small.
+        db.session.execute(
+            text(
+                "INSERT INTO shows (start_time, end_time, venue_id, artist_id) "
+                "SELECT :start, :end, v.id, a.id FROM "
+                "(SELECT id, row_number() OVER (ORDER BY id) - 1 AS n FROM venues) v "
+                "JOIN (SELECT id, row_number() OVER (ORDER BY id) - 1 AS n "
+                "FROM artists) a ON a.n = (v.n + :offset) % :artists"
+            ),
+            {
+                "start": today + timedelta(days=day, hours=20),
+                "end": today + timedelta(days=day, hours=23),
+                "offset": day + days,
+                "artists": artists,
+            },
+        )
+        db.session.commit()
+    db.session.execute(text("ANALYZE shows"))
+    db.session.commit()
+    counters.check(fix=True)
+    print(f"{venues * (2 * days + 1)} shows.", file=sys.stderr)
+
+
+def statements(now):
+    venue_id = (
+        db.session.query(Venue.id)
+        .order_by(Venue.upcoming_shows_count.desc())
+        .limit(1)
+        .scalar()
+    )
+    longest = timedelta(hours=current_app.config["SHOW_MAX_HOURS"])
+    month = month_start(now)
+    # A three hour booking a month from now.
+    booked = now + timedelta(days=30)
+    return {
+        "venue shows": show_statement(
+            Show.venue_id, venue_id, Artist, (Artist.id, Artist.name)
+        ),
+        # As in queries.booking_conflict.
+        "booking check": db.session.query(Show.start_time)
+        .filter(
+            Show.venue_id == venue_id,
+            Show.start_time > booked - longest,
+            Show.start_time < booked + timedelta(hours=3),
+            Show.end_time > booked,
+        )
+        .limit(1)
+        .statement,
+        # As in availability.busy_in_month.
+        "calendar month": db.session.query(Show.start_time, Show.end_time)
+        .filter(
+            Show.venue_id == venue_id,
+            Show.start_time > month - longest,
+            Show.start_time < next_month(month),
+        )
+        .order_by(Show.start_time)
+        .statement,
+        # As in counters.rollover, a day after the last one.
+        "counters rollover": db.session.query(Show.venue_id, func.count(Show.id))
+        .filter(Show.start_time > now - timedelta(days=1), Show.start_time <= now)
+        .group_by(Show.venue_id)
+        .statement,
+        "first /shows page": db.session.query(Show.id, Show.start_time)
+        .order_by(Show.start_time, Show.id)
+        .limit(current_app.config["SHOWS_PAGE_SIZE"] + 1)
+        .statement,
+    }
+
+
+def tables(plan, found):
+    """Add the shows tables in `plan` to `found` as {name: read}."""
+    name = plan.get("Relation Name", "")
+    if name == "shows" or name.startswith("shows_"):
+        found[name] = found.get(name, False) or plan.get("Actual Loops", 0) > 0
+    for child in plan.get("Plans", ()):
+        tables(child, found)
+    return found
+
+
+def explain(statement, runs):
+    compiled = statement.compile(dialect=db.engine.dialect)
+    connection = db.session.connection()
+    times = []
+    for _ in range(runs):
+        (result,) = connection.exec_driver_sql(
+            f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {compiled}", compiled.params
+        ).scalar()
+        times.append(result["Execution Time"])
+    found = tables(result["Plan"], {})
+    return {
+        "execution_ms": round(statistics.median(times), 2),
+        "tables_planned": len(found),
+        "tables_read": sum(found.values()),
+        "shared_buffers": result["Plan"].get("Shared Hit Blocks", 0)
+        + result["Plan"].get("Shared Read Blocks", 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    fill_parser = commands.add_parser("fill", help="Generate shows in SQL.")
+    fill_parser.add_argument("--days", type=int, default=365)
+    run_parser = commands.add_parser("run", help="Explain and time the queries.")
+    run_parser.add_argument("--runs", type=int, default=5, help="Per query.")
+    run_parser.add_argument("--output", help="Write the results here as JSON.")
+    run_parser.add_argument("--baseline", help="Results of an earlier run to compare.")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name != "postgresql":
+            sys.exit("Shows are only partitioned on Postgres.")
+        if args.command == "fill":
+            fill(args.days)
+            return
+        result = {
+            name: explain(statement, args.runs)
+            for name, statement in statements(datetime.now()).items()
+        }
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    for name, query in result.items():
+        before = baseline.get(name)
+        print(
+            f"{name:<24} {query['execution_ms']:>10} ms "
+            f"{query['tables_read']:>4}/{query['tables_planned']:<4} tables read"
+            + (f"   was {before['execution_ms']} ms" if before else ""),
+            file=sys.stderr,
+        )
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
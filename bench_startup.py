@@ -0,0 +1,67 @@
+"""Measure how long a fresh worker takes to become ready.
+
+Each run starts a new interpreter and times three phases: importing `app`,
+`create_app()`, and the first request to the home page, which compiles
+its templates. Prints the median of each phase as JSON and exits non-zero
+when a phase exceeds its --max-*-ms budget:
+
+    python bench_startup.py --runs 10 --max-import-ms 800
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+flask_app = app.create_app()
+created = time.perf_counter()
+flask_app.test_client().get("/")
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+}))
+"""
+PHASES = ("import_ms", "create_app_ms", "first_request_ms")
+
+
+def measure(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    return {
+        phase: round(statistics.median(sample[phase] for sample in samples), 1)
+        for phase in PHASES
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    for phase in PHASES:
+        parser.add_argument(f"--max-{phase[:-3].replace('_', '-')}-ms", type=float)
+    args = parser.parse_args()
+    result = measure(args.runs)
+    print(json.dumps(result, indent=2))
+    over = [
+        phase
+        for phase in PHASES
+        if getattr(args, f"max_{phase}") is not None
+        and result[phase] > getattr(args, f"max_{phase}")
+    ]
+    if over:
+        sys.exit(f"Over budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
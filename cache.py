@@ -0,0 +1,192 @@
+"""Read-through cache for rendered-page data such as venue/artist details.
+
+The backend is chosen by `CACHE_BACKEND`: "lru" (default) keeps entries in
+an in-process LRU bounded by `CACHE_MAX_ENTRIES` and `CACHE_TTL`; "redis"
+stores pickled entries on the server at `CACHE_REDIS_URL`, which needs the
+optional `redis` package.
+
+Invalidation only reaches the process it runs in with "lru", so serving
+from several processes needs "redis": the app refuses to start with "lru"
+when `WORKERS` is above one, and a process forked from one using it (e.g.
+a gunicorn --preload worker) logs a warning.
+"""
+
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+
+class LRUCache:
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key, counted=True):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += counted
+                return None
+            self.entries.move_to_end(key)
+            self.hits += counted
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def stats(self):
+        return {
+            "backend": "lru",
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisCache:
+    def __init__(self, url, ttl, prefix="fyyur:"):
+        if redis is None:
+            raise RuntimeError("CACHE_BACKEND 'redis' requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = self.misses = 0
+
+    def get(self, key, counted=True):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            self.misses += counted
+            return None
+        self.hits += counted
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=max(int(ttl), 1))
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def stats(self):
+        info = self.client.info("stats")
+        return {
+            "backend": "redis",
+            "entries": self.client.dbsize(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": info.get("evicted_keys", 0),
+        }
+
+
+_backend = None
+
+DATA_VERSION_KEY = "data-version"
+DATA_VERSION_TTL = 24 * 60 * 60
+
+
+def init_app(app):
+    global _backend
+    if app.config["CACHE_BACKEND"] == "redis":
+        _backend = RedisCache(app.config["CACHE_REDIS_URL"], app.config["CACHE_TTL"])
+    else:
+        if app.config["WORKERS"] > 1:
+            raise RuntimeError(
+                "CACHE_BACKEND 'lru' can't invalidate across processes; "
+                "set CACHE_BACKEND=redis to run several workers"
+            )
+        _backend = LRUCache(app.config["CACHE_MAX_ENTRIES"], app.config["CACHE_TTL"])
+
+
+def _forked():
+    if isinstance(_backend, LRUCache):
+        logging.getLogger(__name__).warning(
+            "Forked with CACHE_BACKEND 'lru': writes in one worker leave the "
+            "others serving stale pages for up to CACHE_TTL; use redis"
+        )
+
+
+os.register_at_fork(after_in_child=_forked)
+
+
+def get(key):
+    return _backend.get(key)
+
+
+def set(key, value, ttl=None):
+    _backend.set(key, value, ttl)
+
+
+def delete(*keys):
+    _backend.delete(*keys)
+
+
+def stats():
+    return _backend.stats()
+
+
+def venue_key(venue_id):
+    return f"venue:{venue_id}"
+
+
+def artist_key(artist_id):
+    return f"artist:{artist_id}"
+
+
+def calendar_key(venue_id, month):
+    return f"venue:{venue_id}:calendar:{month:%Y-%m}"
+
+
+def data_version():
+    """Stamp that changes whenever venue, artist or show data is written.
+
+    Derived caches (e.g. template fragments) put it in their keys, so a
+    write invalidates them without having to find them.
+    """
+    # Read on every fragment lookup, so kept out of the hit/miss stats.
+    version = _backend.get(DATA_VERSION_KEY, counted=False)
+    if version is None:
+        # Always a new stamp, never an old one, so entries made under a
+        # stamp that was evicted can't become valid again.
+        version = time.time_ns()
+        set(DATA_VERSION_KEY, version, ttl=DATA_VERSION_TTL)
+    return version
+
+
+def invalidate(venue_ids=(), artist_ids=()):
+    """Drop the cached detail pages of the given venues and artists.
+
+    Also moves the data version on, so call it (with no ids) after any
+    write that changes what listings show.
+    """
+    delete(
+        DATA_VERSION_KEY,
+        *(venue_key(id) for id in venue_ids),
+        *(artist_key(id) for id in artist_ids),
+    )
@@ -0,0 +1,200 @@
+"""Upcoming/past show counters kept on `Venue` and `Artist`.
+
+A show counts as upcoming while its start time is after the rollover
+watermark stored in `show_counter_state`. `flask counters rollover` moves
+shows that have since started over to the past counters and advances the
+watermark; schedule it from cron (e.g. every minute). `flask counters
+check` recomputes every counter from the shows table and reports drift.
+"""
+
+from collections import Counter
+from datetime import datetime
+import click
+from flask.cli import AppGroup
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.dialects.postgresql import insert
+from models import db, Venue, Artist, Show, ShowCounterState
+from stats import show_counts
+import cache
+
+counters_cli = AppGroup("counters", help="Maintain venue/artist show counters.")
+
+# (model, Show foreign key) pairs whose counters are maintained.
+COUNTED = ((Venue, Show.venue_id), (Artist, Show.artist_id))
+# Primary key of the one show_counter_state row.
+STATE_ID = 1
+
+
+def get_state(lock=False):
+    query = db.session.query(ShowCounterState).filter_by(id=STATE_ID)
+    if lock:
+        query = query.with_for_update()
+    state = query.first()
+    if state is None:
+        # Callers racing to create the row all end up reading the same one.
+        db.session.execute(
+            insert(ShowCounterState)
+            .values(id=STATE_ID, rolled_over_at=datetime.now())
+            .on_conflict_do_nothing(index_elements=["id"])
+        )
+        state = query.one()
+    return state
+
+
+def record_show(show, delta=1):
+    """Count a show that is being added (delta=1) or removed (delta=-1).
+
+    Runs in the caller's transaction, so the counters commit or roll back
+    together with the show itself.
+    """
+    upcoming = show.start_time > get_state().rolled_over_at
+    for model, key in COUNTED:
+        column = model.upcoming_shows_count if upcoming else model.past_shows_count
+        db.session.query(model).filter(model.id == getattr(show, key.key)).update(
+            {column: column + delta}, synchronize_session=False
+        )
+
+
+def record_shows(shows, delta=1):
+    """Batched record_show() for many shows, given as dicts or rows.
+
+    Issues one executemany UPDATE per table and counter instead of one
+    statement per show.
+    """
+    boundary = get_state().rolled_over_at
+    for model, key in COUNTED:
+        upcoming, past = Counter(), Counter()
+        for show in shows:
+            show = show if isinstance(show, dict) else show._mapping
+            counts = upcoming if show["start_time"] > boundary else past
+            counts[show[key.key]] += 1
+        _apply(model, upcoming, delta, 0)
+        _apply(model, past, 0, delta)
+
+
+def record_cascade(key, id):
+    """Uncount the shows whose `key` (e.g. `Show.venue_id`) is `id`.
+
+    For deleting a venue or artist whose shows go with it by ON DELETE
+    CASCADE: the other side's counters are decremented from one grouped
+    query, without loading the shows.
+    """
+    boundary = get_state().rolled_over_at
+    for model, other in COUNTED:
+        if other is not key:
+            upcoming, past = show_counts(other, boundary, key == id)
+            _apply(model, upcoming, -1, 0)
+            _apply(model, past, 0, -1)
+
+
+def record_removed(*criteria):
+    """Uncount the shows matching `criteria` on both sides, in grouped queries.
+
+    For shows leaving the table in bulk, e.g. an archived partition.
+    """
+    boundary = get_state().rolled_over_at
+    for model, key in COUNTED:
+        upcoming, past = show_counts(key, boundary, *criteria)
+        _apply(model, upcoming, -1, 0)
+        _apply(model, past, 0, -1)
+
+
+def _apply(model, counts, delta_upcoming, delta_past):
+    if not counts:
+        return
+    table = model.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            upcoming_shows_count=table.c.upcoming_shows_count + bindparam("b_upcoming"),
+            past_shows_count=table.c.past_shows_count + bindparam("b_past"),
+        ),
+        [
+            {"b_id": id, "b_upcoming": delta_upcoming * n, "b_past": delta_past * n}
+            for id, n in counts.items()
+        ],
+    )
+
+
+def rollover(now=None):
+    """Move shows that started since the last rollover from upcoming to past.
+
+    Returns the number of shows moved.
+    """
+    if now is None:
+        now = datetime.now()
+    state = get_state(lock=True)
+    moved = 0
+    changed = {}
+    if now > state.rolled_over_at:
+        moved = (
+            db.session.query(func.count(Show.id))
+            .filter(Show.start_time > state.rolled_over_at, Show.start_time <= now)
+            .scalar()
+        )
+        for model, key in COUNTED:
+            counts = dict(
+                db.session.query(key, func.count(Show.id))
+                .filter(Show.start_time > state.rolled_over_at, Show.start_time <= now)
+                .group_by(key)
+                .all()
+            )
+            _apply(model, counts, -1, 1)
+            changed[model] = list(counts)
+        state.rolled_over_at = now
+    db.session.commit()
+    if moved:
+        # Their pages, and listings showing counts, are now stale.
+        cache.invalidate(venue_ids=changed[Venue], artist_ids=changed[Artist])
+    return moved
+
+
+def check(fix=False):
+    """Recompute every counter from the shows table.
+
+    Returns a list of (table, id, stored, expected) tuples for each row
+    whose stored (upcoming, past) counters drifted; with `fix` the
+    expected values are written back.
+    """
+    state = get_state(lock=fix)
+    drift = []
+    for model, key in COUNTED:
+        upcoming, past = show_counts(key, state.rolled_over_at)
+        rows = db.session.query(
+            model.id, model.upcoming_shows_count, model.past_shows_count
+        )
+        for id, stored_upcoming, stored_past in rows.yield_per(1000):
+            expected = (upcoming.get(id, 0), past.get(id, 0))
+            if (stored_upcoming, stored_past) != expected:
+                drift.append(
+                    (model.__tablename__, id, (stored_upcoming, stored_past), expected)
+                )
+    if fix:
+        for table, id, stored, expected in drift:
+            model = Venue if table == Venue.__tablename__ else Artist
+            db.session.query(model).filter(model.id == id).update(
+                {
+                    model.upcoming_shows_count: expected[0],
+                    model.past_shows_count: expected[1],
+                },
+                synchronize_session=False,
+            )
+    db.session.commit()
+    return drift
+
+
+@counters_cli.command("rollover")
+def rollover_command():
+    """Move started shows from the upcoming to the past counters."""
+    click.echo(f"Rolled over {rollover()} shows.")
+
+
+@counters_cli.command("check")
+@click.option("--fix", is_flag=True, help="Rewrite counters that drifted.")
+def check_command(fix):
+    """Rebuild counters from the shows table and report drift."""
+    drift = check(fix=fix)
+    for table, id, stored, expected in drift:
+        click.echo(f"{table} {id}: stored upcoming/past {stored}, expected {expected}")
+    click.echo(f"{len(drift)} rows drifted{' (fixed)' if fix and drift else ''}.")
@@ -0,0 +1,131 @@
+"""Deleting venues and artists.
+
+A hard delete is a single DELETE of the venue or artist row. Its shows
+follow through the ON DELETE CASCADE foreign keys, so nothing is loaded
+into the session however busy the venue was. With `SOFT_DELETE` the row
+is only stamped with `deleted_at`, which hides it from every ORM query at
+once. `flask purge` later removes stamped rows, deleting their shows in
+batches of `--batch-size` so no single statement holds locks for long.
+Schedule it from cron like `flask counters rollover`. Until a row is
+purged, its shows still count towards the other side's counters.
+"""
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session, with_loader_criteria
+from models import db, Venue, Artist, Show
+from queries import booked_ids
+import availability
+import cache
+import counters
+
+# Model -> (its Show foreign key, the Show foreign key of the other side).
+DEPENDENTS = {
+    Venue: (Show.venue_id, Show.artist_id),
+    Artist: (Show.artist_id, Show.venue_id),
+}
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _hide_deleted(execute_state):
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            *(
+                with_loader_criteria(model, model.deleted_at.is_(None))
+                for model in DEPENDENTS
+            )
+        )
+
+
+def delete(model, id):
+    """Delete (or soft-delete) a venue or artist; False if there was none."""
+    key, other = DEPENDENTS[model]
+    other_ids = booked_ids(key, id, other)
+    bookings = []
+    if model is Artist:
+        # The venues' calendars lose these shows.
+        bookings = (
+            db.session.query(Show.venue_id, Show.start_time, Show.end_time)
+            .filter(key == id)
+            .all()
+        )
+    query = db.session.query(model).filter(model.id == id, model.deleted_at.is_(None))
+    if current_app.config["SOFT_DELETE"]:
+        deleted = query.update(
+            {model.deleted_at: func.now()}, synchronize_session=False
+        )
+    else:
+        counters.record_cascade(key, id)
+        deleted = query.delete(synchronize_session=False)
+    db.session.commit()
+    if deleted:
+        invalidate(model, [id], other_ids)
+        availability.invalidate(bookings)
+    return bool(deleted)
+
+
+def invalidate(model, ids, other_ids):
+    if model is Venue:
+        cache.invalidate(venue_ids=ids, artist_ids=other_ids)
+    else:
+        cache.invalidate(venue_ids=other_ids, artist_ids=ids)
+
+
+def purge(batch_size=1000):
+    """Hard-delete soft-deleted venues and artists; returns how many."""
+    purged = 0
+    for model, (key, other) in DEPENDENTS.items():
+        ids = [
+            id
+            for id, in db.session.query(model.id)
+            .filter(model.deleted_at.isnot(None))
+            .execution_options(include_deleted=True)
+        ]
+        for id in ids:
+            while True:
+                shows = (
+                    db.session.query(
+                        Show.id,
+                        Show.venue_id,
+                        Show.artist_id,
+                        Show.start_time,
+                        Show.end_time,
+                    )
+                    .filter(key == id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not shows:
+                    break
+                counters.record_shows(shows, -1)
+                db.session.query(Show).filter(
+                    Show.id.in_([show.id for show in shows])
+                ).delete(synchronize_session=False)
+                db.session.commit()
+                invalidate(model, [], {getattr(show, other.key) for show in shows})
+                availability.invalidate(
+                    (show.venue_id, show.start_time, show.end_time) for show in shows
+                )
+            db.session.query(model).filter(model.id == id).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+            purged += 1
+    return purged
+
+
+@click.command("purge")
+@click.option(
+    "--batch-size", default=1000, show_default=True, help="Shows deleted per batch."
+)
+@with_appcontext
+def purge_command(batch_size):
+    """Remove soft-deleted venues and artists and their shows."""
+    click.echo(f"Purged {purge(batch_size)} venues and artists.")
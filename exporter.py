@@ -0,0 +1,126 @@
+"""Streaming export of venues, artists and shows as JSONL or CSV.
+
+Rows are read through a server-side cursor in `--fetch-size` partitions
+and written out as they arrive, optionally gzip-compressed, so memory
+stays flat however large the table is. Exports are ordered by id and can
+be resumed with `--after-id` (or `?after_id=`), using the last id an
+interrupted run reported; the resumed output can be appended to the
+interrupted one, gzipped or not.
+"""
+
+import csv
+import io
+import json
+import zlib
+import click
+from flask import Blueprint, Response, abort, current_app, request, stream_with_context
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from api import _default
+from auth import token_required
+from models import db, Venue, Artist, Show
+
+TABLES = {"venues": Venue, "artists": Artist, "shows": Show}
+FORMATS = ("jsonl", "csv")
+
+export = Blueprint("export", __name__)
+
+
+def csv_value(value):
+    # Lists are comma-joined, matching what `flask import` reads back.
+    if isinstance(value, list):
+        return ",".join(value)
+    return _default(value) if hasattr(value, "isoformat") else value
+
+
+def export_batches(table, format, after_id=0, fetch_size=1000):
+    """Yield (serialized chunk, rows in it, last id in it) per `fetch_size` rows.
+
+    A CSV export starts with a header row, except when resuming after an
+    id: its output is appended to the interrupted one's, which has it.
+    """
+    columns = TABLES[table].__table__.c
+    names = [column.key for column in columns]
+    result = db.session.execute(
+        select(columns).where(columns.id > after_id).order_by(columns.id),
+        execution_options={"stream_results": True},
+    )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if format == "csv" and not after_id:
+        writer.writerow(names)
+    for rows in result.partitions(fetch_size):
+        if format == "csv":
+            writer.writerows([csv_value(value) for value in row] for row in rows)
+        else:
+            buffer.writelines(
+                json.dumps(dict(zip(names, row)), default=_default) + "\n"
+                for row in rows
+            )
+        yield buffer.getvalue().encode(), len(rows), rows[-1].id
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.getvalue():  # the header of an empty export
+        yield buffer.getvalue().encode(), 0, after_id
+
+
+def gzip_member(chunk):
+    """`chunk` as a complete gzip member.
+
+    A gzip file may hold several members back to back, so compressing each
+    chunk on its own leaves whatever was written before an interruption
+    readable, and a resumed export can be appended to it.
+    """
+    compressor = zlib.compressobj(wbits=31)
+    return compressor.compress(chunk) + compressor.flush()
+
+
+@export.route("/export/<table>.<format>")
+@token_required
+def export_download(table, format):
+    if table not in TABLES or format not in FORMATS:
+        abort(404)
+    after_id = request.args.get("after_id", 0, type=int)
+    batches = export_batches(
+        table, format, after_id, current_app.config["EXPORT_FETCH_SIZE"]
+    )
+    chunks = (chunk for chunk, rows, last_id in batches)
+    filename = f"{table}.{format}"
+    mimetype = "text/csv" if format == "csv" else "application/x-ndjson"
+    if request.args.get("gzip"):
+        chunks = map(gzip_member, chunks)
+        filename += ".gz"
+        mimetype = "application/gzip"
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+@click.command("export")
+@click.argument("table", type=click.Choice(sorted(TABLES)))
+@click.option(
+    "--format", type=click.Choice(FORMATS), default="jsonl", show_default=True
+)
+@click.option("--output", "-o", type=click.File("ab"), default="-", help="Appended to.")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip-compress the output.")
+@click.option("--after-id", default=0, help="Resume after this id.")
+@click.option("--fetch-size", default=5000, show_default=True)
+@with_appcontext
+def export_command(table, format, output, compress, after_id, fetch_size):
+    """Stream TABLE to OUTPUT as JSONL or CSV."""
+    state = {"rows": 0, "last_id": after_id}
+    try:
+        for chunk, rows, last_id in export_batches(table, format, after_id, fetch_size):
+            output.write(gzip_member(chunk) if compress else chunk)
+            # Only rows already written count towards the resume point.
+            state["rows"] += rows
+            state["last_id"] = last_id
+    finally:
+        output.flush()
+        click.echo(
+            f"{state['rows']} {table} exported; last id {state['last_id']} "
+            f"(resume with --after-id {state['last_id']}).",
+            err=True,
+        )
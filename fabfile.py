@@ -1,3 +1,4 @@
+import os
 from fabric.api import local, settings, abort
 from fabric.contrib.console import confirm
 
@@ -5,9 +6,17 @@ from fabric.contrib.console import confirm
 
 
 def test():
+    # The benchmark needs a seeded scratch database; never fall back to
+    # the DATABASE_URL the app would use.
+    bench_database = os.environ.get("BENCH_DATABASE_URL")
+    if not bench_database:
+        abort("Set BENCH_DATABASE_URL to a seeded scratch database (see README).")
     with settings(warn_only=True):
         result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
+            "python -m compileall -q . && python -m pytest -q"
+            " && DATABASE_URL='{}' python bench.py"
+            " --baseline bench-baseline.json".format(bench_database),
+            capture=True,
         )
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
@@ -39,9 +48,7 @@ def heroku():
 
 
 def heroku_test():
-    local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
-    )
+    local("heroku run python bench_startup.py --runs 3")
 
 
 def deploy():
@@ -0,0 +1,76 @@
+from sqlalchemy import cast, distinct, func, select, true, tuple_
+from sqlalchemy.dialects import postgresql
+from werkzeug.exceptions import BadRequest
+from forms import GENRE_NAMES, STATE_NAMES
+from models import Venue
+
+# ----------------------------------------------------------------------------#
+# Listing filters and facets.
+# ----------------------------------------------------------------------------#
+
+TRUE_VALUES = ("1", "true", "yes", "on")
+
+
+def seeking_column(model):
+    return model.seeking_talent if model is Venue else model.seeking_venue
+
+
+def listing_filters(model, args):
+    """SQL filters for `?genre=&state=&city=&seeking=` on a listing page.
+
+    Returns (filters, active) where `active` holds the accepted arguments,
+    for building links that keep them. Raises BadRequest on unknown
+    genre or state names.
+    """
+    filters, active = [], {}
+    genre = args.get("genre")
+    if genre:
+        if genre not in GENRE_NAMES:
+            raise BadRequest(f"Unknown genre {genre!r}.")
+        # `@>` rather than `= ANY()` so the GIN index on genres is used. The
+        # literal array is text[]; cast it, as varchar[] @> text[] is undefined.
+        filters.append(
+            model.genres.op("@>")(cast(postgresql.array([genre]), model.genres.type))
+        )
+        active["genre"] = genre
+    state = args.get("state")
+    if state:
+        if state not in STATE_NAMES:
+            raise BadRequest(f"Unknown state {state!r}.")
+        filters.append(model.state == state)
+        active["state"] = state
+    city = args.get("city")
+    if city:
+        filters.append(model.city == city)
+        active["city"] = city
+    seeking = args.get("seeking")
+    if seeking:
+        filters.append(seeking_column(model) == (seeking.lower() in TRUE_VALUES))
+        active["seeking"] = seeking
+    return filters, active
+
+
+def facet_query(model, filters):
+    """Per-genre and per-state counts of the rows matching `filters`.
+
+    Both facets come from one GROUPING SETS query over the unnested genres;
+    pass its rows to `split_facets`.
+    """
+    genre = func.unnest(model.genres).table_valued("genre").lateral("genre")
+    return (
+        select(genre.c.genre, model.state, func.count(distinct(model.id)))
+        .select_from(model.__table__.join(genre, true()))
+        .where(*filters)
+        .group_by(func.grouping_sets(tuple_(genre.c.genre), tuple_(model.state)))
+    )
+
+
+def split_facets(rows):
+    """({genre: count}, {state: count}) from the rows of `facet_query`."""
+    genres, states = {}, {}
+    for genre_name, state, count in rows:
+        if genre_name is not None:
+            genres[genre_name] = count
+        else:
+            states[state] = count
+    return genres, states
@@ -1,4 +1,5 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from flask import current_app
 from flask_wtf import Form, CSRFProtect
 from wtforms import (
     StringField,
@@ -7,16 +8,50 @@ from wtforms import (
     DateTimeField,
     BooleanField,
 )
-from wtforms.validators import DataRequired, AnyOf, URL, ValidationError, Regexp
+from wtforms.validators import (
+    DataRequired,
+    AnyOf,
+    URL,
+    Optional,
+    ValidationError,
+    Regexp,
+)
 from enums import Genre, State
 import re
 
 csrf = CSRFProtect()
 
 
+PHONE_REGEX = re.compile("^\(?([0-9]{3})\)?[-. ]?([0-9]{3})[-. ]?([0-9]{4})$")
+GENRE_NAMES = frozenset(name for name, value in Genre.choices())
+STATE_NAMES = frozenset(name for name, value in State.choices())
+
+
 def is_valid_phone(number):
-    regex = re.compile("^\(?([0-9]{3})\)?[-. ]?([0-9]{3})[-. ]?([0-9]{4})$")
-    return regex.match(number)
+    return PHONE_REGEX.match(number)
+
+
+def check_listing(phone, genres, state):
+    """Checks shared by venues and artists beyond the field validators.
+
+    Returns a (field name, message) pair for the first failure, else None.
+    """
+    if not is_valid_phone(phone):
+        return "phone", "Invalid phone."
+    if not GENRE_NAMES.issuperset(genres):
+        return "genres", "Invalid genres."
+    if state not in STATE_NAMES:
+        return "state", "Invalid state."
+    return None
+
+
+def check_show_times(start_time, end_time, max_hours):
+    """Returns a (field name, message) pair if a show's times are unusable."""
+    if end_time <= start_time:
+        return "end_time", "End time must be after the start time."
+    if end_time - start_time > timedelta(hours=max_hours):
+        return "end_time", f"Shows can't run longer than {max_hours} hours."
+    return None
 
 
 class ShowForm(Form):
@@ -25,6 +60,23 @@ class ShowForm(Form):
     start_time = DateTimeField(
         "start_time", validators=[DataRequired()], default=datetime.today()
     )
+    end_time = DateTimeField("end_time", validators=[Optional()])
+
+    def validate(self):
+        if not Form.validate(self):
+            return False
+        config = current_app.config
+        if self.end_time.data is None:
+            self.end_time.data = self.start_time.data + timedelta(
+                hours=config["SHOW_DEFAULT_HOURS"]
+            )
+        error = check_show_times(
+            self.start_time.data, self.end_time.data, config["SHOW_MAX_HOURS"]
+        )
+        if error:
+            getattr(self, error[0]).errors.append(error[1])
+            return False
+        return True
 
 
 class VenueForm(Form):
@@ -59,14 +111,9 @@ class VenueForm(Form):
         rv = Form.validate(self)
         if not rv:
             return False
-        if not is_valid_phone(self.phone.data):
-            self.phone.errors.append("Invalid phone.")
-            return False
-        if not set(self.genres.data).issubset(dict(Genre.choices()).keys()):
-            self.genres.errors.append("Invalid genres.")
-            return False
-        if self.state.data not in dict(State.choices()).keys():
-            self.state.errors.append("Invalid state.")
+        error = check_listing(self.phone.data, self.genres.data, self.state.data)
+        if error:
+            getattr(self, error[0]).errors.append(error[1])
             return False
         # if pass validation
         return True
@@ -105,14 +152,9 @@ class ArtistForm(Form):
         rv = Form.validate(self)
         if not rv:
             return False
-        if not is_valid_phone(self.phone.data):
-            self.phone.errors.append("Invalid phone.")
-            return False
-        if not set(self.genres.data).issubset(dict(Genre.choices()).keys()):
-            self.genres.errors.append("Invalid genres.")
-            return False
-        if self.state.data not in dict(State.choices()).keys():
-            self.state.errors.append("Invalid state.")
+        error = check_listing(self.phone.data, self.genres.data, self.state.data)
+        if error:
+            getattr(self, error[0]).errors.append(error[1])
             return False
         # if pass validation
         return True
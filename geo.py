@@ -0,0 +1,201 @@
+"""Venue locations and "venues near me" search.
+
+A venue's latitude and longitude come from the bundled gazetteer
+(`data/gazetteer.csv`, one point per city), looked up offline by city and
+state whenever a venue is created or moves. Venues in cities the
+gazetteer doesn't know have no location until it does; `flask geocode`
+fills in venues stored before then.
+
+Each located venue also stores the geohash of its point, indexed with a
+B-tree. Nearby points share geohash prefixes, so `nearby()` covers the
+search circle with at most `MAX_CELLS` cells of the finest size that
+allows, reads only the venues whose geohash starts with one of them (an
+index range scan each) and keeps those actually within the radius.
+"""
+
+import csv
+import math
+import os
+from operator import itemgetter
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, or_, update
+from models import db, Venue
+
+GAZETTEER = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv"
+)
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+# Stored geohash length: cells of about 5 x 5 m.
+PRECISION = 9
+MAX_CELLS = 32
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+_gazetteer = None
+
+
+def geocode(city, state):
+    """(latitude, longitude) of a city, or None if the gazetteer lacks it."""
+    global _gazetteer
+    if _gazetteer is None:
+        with open(GAZETTEER, newline="", encoding="utf-8") as f:
+            _gazetteer = {
+                (row["city"].lower(), row["state"]): (
+                    float(row["latitude"]),
+                    float(row["longitude"]),
+                )
+                for row in csv.DictReader(f)
+            }
+    return _gazetteer.get(((city or "").strip().lower(), state))
+
+
+def location(city, state):
+    """Values of the location columns for a venue in `city`, `state`."""
+    point = geocode(city, state)
+    if point is None:
+        return {"latitude": None, "longitude": None, "geohash": None}
+    return {"latitude": point[0], "longitude": point[1], "geohash": encode(*point)}
+
+
+def encode(latitude, longitude, precision=PRECISION):
+    intervals = [[-180.0, 180.0], [-90.0, 90.0]]
+    values = (longitude, latitude)
+    chars, bits = [], 0
+    for bit in range(precision * 5):
+        interval, value = intervals[bit % 2], values[bit % 2]
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        if bit % 5 == 4:
+            chars.append(BASE32[bits])
+            bits = 0
+    return "".join(chars)
+
+
+def cell_size(precision):
+    """(height, width) in degrees of the geohash cells of `precision`."""
+    return 180 / 2 ** (precision * 5 // 2), 360 / 2 ** ((precision * 5 + 1) // 2)
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """Geohash prefixes covering the circle, or None if it needs too many."""
+    south = max(latitude - radius_km / KM_PER_DEGREE, -90.0)
+    north = min(latitude + radius_km / KM_PER_DEGREE, 90.0)
+    # A kilometre spans the most longitude on the circle's poleward edge.
+    poleward = math.cos(math.radians(max(abs(south), abs(north))))
+    half_width = radius_km / (KM_PER_DEGREE * max(poleward, 1e-9))
+    for precision in range(PRECISION, 0, -1):
+        height, width = cell_size(precision)
+        columns = round(360 / width)
+        rows = range(int((south + 90) // height), int((north + 90) // height) + 1)
+        if half_width >= 180:
+            cols = range(columns)
+        else:
+            west = int((longitude - half_width + 180) // width)
+            cols = range(west, int((longitude + half_width + 180) // width) + 1)
+        if len(rows) * min(len(cols), columns) > MAX_CELLS:
+            continue
+        return {
+            encode(
+                min(-90 + (row + 0.5) * height, 90.0),
+                -180 + (col % columns + 0.5) * width,
+                precision,
+            )
+            for row in rows
+            for col in cols
+        }
+    return None
+
+
+def distance_km(latitude1, longitude1, latitude2, longitude2):
+    """Great-circle (haversine) distance."""
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1)
+        * math.cos(phi2)
+        * math.sin(math.radians(longitude2 - longitude1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1.0))
+
+
+def nearby(latitude, longitude, radius_km, limit):
+    """[(distance in km, venue row)] within the radius, nearest first."""
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        Venue.latitude,
+        Venue.longitude,
+    ).filter(Venue.geohash.isnot(None))
+    cells = covering_cells(latitude, longitude, radius_km)
+    if cells is not None:
+        query = query.filter(
+            or_(*(Venue.geohash.like(f"{cell}%") for cell in sorted(cells)))
+        )
+    hits = []
+    for venue in query:
+        distance = distance_km(latitude, longitude, venue.latitude, venue.longitude)
+        if distance <= radius_km:
+            hits.append((distance, venue))
+    hits.sort(key=itemgetter(0))
+    return hits[:limit]
+
+
+def relocate(ids):
+    """Recompute the location of venues `ids` from their city and state.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    rows = (
+        db.session.query(Venue.id, Venue.city, Venue.state)
+        .filter(Venue.id.in_(ids))
+        .execution_options(include_deleted=True)
+        .all()
+    )
+    if not rows:
+        return
+    table = Venue.__table__
+    db.session.execute(
+        update(table)
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            latitude=bindparam("b_latitude"),
+            longitude=bindparam("b_longitude"),
+            geohash=bindparam("b_geohash"),
+        ),
+        [
+            {
+                "b_id": id,
+                **{f"b_{name}": value for name, value in location(city, state).items()},
+            }
+            for id, city, state in rows
+        ],
+    )
+
+
+@click.command("geocode")
+@click.option(
+    "--all", "everything", is_flag=True, help="Also re-locate located venues."
+)
+@click.option("--batch-size", default=1000, show_default=True)
+@with_appcontext
+def geocode_command(everything, batch_size):
+    """Locate venues from the bundled gazetteer."""
+    query = db.session.query(Venue.id).execution_options(include_deleted=True)
+    if not everything:
+        query = query.filter(Venue.geohash.is_(None))
+    ids = [id for id, in query.order_by(Venue.id)]
+    for start in range(0, len(ids), batch_size):
+        relocate(ids[start : start + batch_size])
+        db.session.commit()
+    missing = db.session.query(Venue.id).filter(Venue.geohash.is_(None)).count()
+    click.echo(
+        f"Looked up {len(ids)} venues; {missing} are in cities the gazetteer lacks."
+    )
@@ -0,0 +1,282 @@
+"""`flask import`: bulk-load venues, artists or shows from CSV or JSONL.
+
+Records are streamed from the file, checked with the same validators as
+`VenueForm`/`ArtistForm`/`ShowForm` and inserted in batches with a single
+executemany per batch, so memory stays bounded by `--batch-size`. Rows
+that fail validation or insertion are written to a JSONL reject file.
+"""
+
+import csv
+import json
+import time
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from wtforms.fields.core import UnboundField
+from wtforms.validators import StopValidation, ValidationError
+from forms import ArtistForm, ShowForm, VenueForm, check_listing, check_show_times
+from models import db, Venue, Artist, Show
+from queries import booking_conflict
+import availability
+import cache
+import counters
+import geo
+
+TRUE_STRINGS = frozenset(("1", "true", "t", "yes", "y", "on"))
+
+
+class RawField:
+    """Just enough of a WTForms field to run form validators on a raw value."""
+
+    def __init__(self, data):
+        self.data = data
+        self.raw_data = [] if data is None else [data]
+        self.errors = []
+
+    @staticmethod
+    def gettext(string):
+        return string
+
+    @staticmethod
+    def ngettext(singular, plural, n):
+        return singular if n == 1 else plural
+
+
+def form_validators(form_class):
+    """{field name: validators} declared on a form class, computed once."""
+    return {
+        name: field.kwargs.get("validators") or ()
+        for name in dir(form_class)
+        if isinstance(field := getattr(form_class, name), UnboundField)
+    }
+
+
+def run_validators(validators, record):
+    for name, field_validators in validators.items():
+        field = RawField(record.get(name))
+        for validator in field_validators:
+            try:
+                validator(None, field)
+            except StopValidation as e:
+                if e.args and e.args[0]:
+                    raise ValueError(f"{name}: {e.args[0]}")
+                break  # Optional() on an empty value ends the chain
+            except ValidationError as e:
+                raise ValueError(f"{name}: {e.args[0] if e.args else 'invalid'}")
+
+
+def as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or "").strip().lower() in TRUE_STRINGS
+
+
+def as_datetime(name, value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f"{name}: not an ISO 8601 date and time")
+
+
+def as_list(value):
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in str(value or "").split(",") if item.strip()]
+
+
+class ListingImport:
+    """Validation and coercion shared by venues and artists."""
+
+    def __init__(self, model, form_class, seeking):
+        self.model = model
+        self.validators = form_validators(form_class)
+        self.seeking = seeking
+        self.columns = [
+            c.key for c in model.__table__.columns if c.key in self.validators
+        ]
+
+    def prepare(self):
+        pass
+
+    def clean(self, record):
+        record = dict(record)
+        record["genres"] = as_list(record.get("genres"))
+        record[self.seeking] = as_bool(record.get(self.seeking))
+        run_validators(self.validators, record)
+        error = check_listing(record["phone"], record["genres"], record["state"])
+        if error:
+            raise ValueError(f"{error[0]}: {error[1]}")
+        if not record[self.seeking]:
+            record["seeking_description"] = None
+        row = {column: record.get(column) for column in self.columns}
+        row["upcoming_shows_count"] = row["past_shows_count"] = 0
+        if self.model is Venue:
+            row.update(geo.location(row["city"], row["state"]))
+        return row
+
+    def inserted(self, rows):
+        cache.invalidate()
+
+
+class ShowImport:
+    model = Show
+
+    def __init__(self):
+        self.validators = form_validators(ShowForm)
+
+    def prepare(self):
+        # Referential checks against in-memory id sets instead of a query
+        # per row; an id is a few dozen bytes even for millions of rows.
+        self.venue_ids = {id for id, in db.session.query(Venue.id).yield_per(10000)}
+        self.artist_ids = {id for id, in db.session.query(Artist.id).yield_per(10000)}
+        self.default_hours = current_app.config["SHOW_DEFAULT_HOURS"]
+        self.max_hours = current_app.config["SHOW_MAX_HOURS"]
+
+    def clean(self, record):
+        run_validators(self.validators, record)
+        try:
+            venue_id = int(record["venue_id"])
+            artist_id = int(record["artist_id"])
+        except ValueError:
+            raise ValueError("venue_id/artist_id: must be integers")
+        if venue_id not in self.venue_ids:
+            raise ValueError(f"venue_id: unknown venue {venue_id}")
+        if artist_id not in self.artist_ids:
+            raise ValueError(f"artist_id: unknown artist {artist_id}")
+        start_time = as_datetime("start_time", record["start_time"])
+        if record.get("end_time"):
+            end_time = as_datetime("end_time", record["end_time"])
+        else:
+            end_time = start_time + timedelta(hours=self.default_hours)
+        error = check_show_times(start_time, end_time, self.max_hours)
+        if error:
+            raise ValueError(f"{error[0]}: {error[1]}")
+        row = {
+            "venue_id": venue_id,
+            "artist_id": artist_id,
+            "start_time": start_time,
+            "end_time": end_time,
+        }
+        # Clashing bookings are left to the exclusion constraints, which
+        # reject them in insert()'s row-by-row fallback. Those only see one
+        # monthly partition, so shows that could clash with one in another
+        # month are checked here.
+        earliest = start_time - timedelta(hours=self.max_hours)
+        if availability.month_start(earliest) != availability.month_start(end_time):
+            conflict = booking_conflict(Show(**row))
+            if conflict:
+                raise ValueError(conflict)
+        return row
+
+    def inserted(self, rows):
+        counters.record_shows(rows)
+        cache.invalidate(
+            venue_ids={row["venue_id"] for row in rows},
+            artist_ids={row["artist_id"] for row in rows},
+        )
+        availability.invalidate(
+            (row["venue_id"], row["start_time"], row["end_time"]) for row in rows
+        )
+
+
+IMPORTS = {
+    "venues": lambda: ListingImport(Venue, VenueForm, "seeking_talent"),
+    "artists": lambda: ListingImport(Artist, ArtistForm, "seeking_venue"),
+    "shows": ShowImport,
+}
+
+
+def read_records(file, format):
+    """(line number, record dict) per record; a ValueError for unreadable ones."""
+    if format == "csv":
+        yield from enumerate(csv.DictReader(file), start=2)
+        return
+    for line_number, line in enumerate(file, start=1):
+        if line.strip():
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f"invalid JSON: {e}")
+                continue
+            if not isinstance(record, dict):
+                record = ValueError(f"not a JSON object: {line.strip()[:80]}")
+            yield line_number, record
+
+
+def insert(kind, rows, reject):
+    """Insert a batch with one executemany; isolate bad rows on failure."""
+    table = kind.model.__table__
+    try:
+        db.session.execute(table.insert(), [row for line, row in rows])
+        kind.inserted([row for line, row in rows])
+        db.session.commit()
+        return len(rows)
+    except Exception:
+        db.session.rollback()
+    inserted = 0
+    for line, row in rows:
+        try:
+            db.session.execute(table.insert(), [row])
+            kind.inserted([row])
+            db.session.commit()
+            inserted += 1
+        except Exception as e:
+            db.session.rollback()
+            reject(line, row, str(getattr(e, "orig", e)))
+    return inserted
+
+
+@click.command("import")
+@with_appcontext
+@click.argument("table", type=click.Choice(sorted(IMPORTS)))
+@click.argument("source", type=click.File("r", encoding="utf-8"))
+@click.option(
+    "--format", type=click.Choice(["csv", "jsonl"]), help="Default: by extension."
+)
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option(
+    "--rejects", type=click.File("w", encoding="utf-8"), help="Reject file (JSONL)."
+)
+def import_command(table, source, format, batch_size, rejects):
+    """Bulk-load TABLE from a CSV or JSONL SOURCE file."""
+    format = format or ("csv" if source.name.endswith(".csv") else "jsonl")
+    kind = IMPORTS[table]()
+    kind.prepare()
+    stats = {"read": 0, "inserted": 0, "rejected": 0}
+
+    def reject(line, record, error):
+        stats["rejected"] += 1
+        if rejects is not None:
+            rejects.write(
+                json.dumps(
+                    {"line": line, "error": error, "record": record}, default=str
+                )
+                + "\n"
+            )
+
+    started = time.perf_counter()
+    batch = []
+    for line, record in read_records(source, format):
+        stats["read"] += 1
+        if isinstance(record, Exception):
+            reject(line, None, str(record))
+            continue
+        try:
+            batch.append((line, kind.clean(record)))
+        except (KeyError, TypeError, ValueError) as e:
+            reject(line, record, str(e))
+        if len(batch) >= batch_size:
+            stats["inserted"] += insert(kind, batch, reject)
+            batch = []
+            rate = stats["read"] / (time.perf_counter() - started)
+            click.echo(f"{stats['read']} rows read, {rate:.0f} rows/s", err=True)
+    if batch:
+        stats["inserted"] += insert(kind, batch, reject)
+    elapsed = time.perf_counter() - started
+    click.echo(
+        f"{stats['inserted']} {table} imported, {stats['rejected']} rejected "
+        f"in {elapsed:.1f}s ({stats['read'] / max(elapsed, 1e-9):.0f} rows/s)."
+    )
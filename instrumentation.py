@@ -0,0 +1,154 @@
+"""Per-request SQL instrumentation and Prometheus metrics.
+
+Every statement run inside a request is counted and timed. The totals are
+sent back in a `Server-Timing` header and aggregated per route into the
+histograms served at /metrics, which like the /internal pages needs the
+API_TOKEN bearer token. Statements slower than
+`SLOW_QUERY_THRESHOLD_MS` are logged with the route that ran them.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from auth import token_required
+
+# Upper bounds, in seconds, of the request latency histogram buckets.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the queries-per-request histogram buckets.
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.queries = {}
+        self.db_seconds = {}
+
+    def observe(self, route, seconds, queries, db_seconds):
+        with self.lock:
+            if route not in self.latency:
+                self.latency[route] = Histogram(LATENCY_BUCKETS)
+                self.queries[route] = Histogram(QUERY_BUCKETS)
+                self.db_seconds[route] = 0.0
+            self.latency[route].observe(seconds)
+            self.queries[route].observe(queries)
+            self.db_seconds[route] += db_seconds
+
+    def render(self):
+        lines = [
+            "# HELP fyyur_request_duration_seconds Request latency by route.",
+            "# TYPE fyyur_request_duration_seconds histogram",
+        ]
+        with self.lock:
+            for route, histogram in sorted(self.latency.items()):
+                lines.extend(
+                    histogram.samples(
+                        "fyyur_request_duration_seconds", f'route="{route}"'
+                    )
+                )
+            lines += [
+                "# HELP fyyur_request_queries SQL statements per request by route.",
+                "# TYPE fyyur_request_queries histogram",
+            ]
+            for route, histogram in sorted(self.queries.items()):
+                lines.extend(
+                    histogram.samples("fyyur_request_queries", f'route="{route}"')
+                )
+            lines += [
+                "# HELP fyyur_db_seconds_total Time spent in SQL by route.",
+                "# TYPE fyyur_db_seconds_total counter",
+            ]
+            for route, seconds in sorted(self.db_seconds.items()):
+                lines.append(f'fyyur_db_seconds_total{{route="{route}"}} {seconds}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = RouteMetrics()
+
+
+def route_name():
+    return request.endpoint or "unmatched"
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    if not has_request_context():
+        return
+    g.query_count = g.get("query_count", 0) + 1
+    g.query_seconds = g.get("query_seconds", 0.0) + elapsed
+    threshold = current_app.config["SLOW_QUERY_THRESHOLD_MS"]
+    if threshold is not None and elapsed * 1000 >= threshold:
+        current_app.logger.warning(
+            "Slow query (%.1f ms) in %s: %s", elapsed * 1000, route_name(), statement
+        )
+
+
+def start_timer():
+    g.request_start = time.perf_counter()
+    g.query_count = 0
+    g.query_seconds = 0.0
+
+
+def add_server_timing(response):
+    # Unset when an earlier before_request hook (e.g. CSRF) ended the request.
+    start = g.get("request_start")
+    if start is None:
+        return response
+    total = time.perf_counter() - start
+    response.headers["Server-Timing"] = (
+        f'db;dur={g.query_seconds * 1000:.2f};desc="{g.query_count} queries", '
+        f"app;dur={total * 1000:.2f}"
+    )
+    return response
+
+
+def record_request(exc):
+    # Runs after streamed responses have finished, so their time counts too.
+    if "request_start" in g:
+        metrics.observe(
+            route_name(),
+            time.perf_counter() - g.request_start,
+            g.query_count,
+            g.query_seconds,
+        )
+
+
+def metrics_view():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+    app.before_request(start_timer)
+    app.after_request(add_server_timing)
+    app.teardown_request(record_request)
+    app.add_url_rule("/metrics", "metrics", token_required(metrics_view))
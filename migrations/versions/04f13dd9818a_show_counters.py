@@ -0,0 +1,57 @@
+"""show counters
+
+Revision ID: 04f13dd9818a
+Revises: bc90ee54f194
+Create Date: 2026-10-18 18:59:15.672846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '04f13dd9818a'
+down_revision = 'bc90ee54f194'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("venues", "artists"):
+        for column in ("upcoming_shows_count", "past_shows_count"):
+            op.add_column(
+                table,
+                sa.Column(column, sa.Integer(), nullable=False, server_default="0"),
+            )
+    op.create_table(
+        "show_counter_state",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("rolled_over_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Backfill the counters against a watermark taken in the same statement
+    # batch, so `flask counters check` reports no drift afterwards.
+    op.execute("INSERT INTO show_counter_state (rolled_over_at) VALUES (now())")
+    for table, key in (("venues", "venue_id"), ("artists", "artist_id")):
+        op.execute(
+            f"""
+            UPDATE {table} SET
+                upcoming_shows_count = counts.upcoming,
+                past_shows_count = counts.total - counts.upcoming
+            FROM (
+                SELECT {key} AS id,
+                       count(*) FILTER (WHERE start_time > w.rolled_over_at) AS upcoming,
+                       count(*) AS total
+                FROM shows, show_counter_state w
+                GROUP BY {key}
+            ) AS counts
+            WHERE {table}.id = counts.id
+            """
+        )
+
+
+def downgrade():
+    op.drop_table("show_counter_state")
+    for table in ("venues", "artists"):
+        for column in ("upcoming_shows_count", "past_shows_count"):
+            op.drop_column(table, column)
@@ -0,0 +1,45 @@
+"""cascading show deletes and soft delete
+
+Revision ID: 2c73d1bcfe3a
+Revises: 3c151b5b1d51
+Create Date: 2026-10-18 19:12:04.199468
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "2c73d1bcfe3a"
+down_revision = "3c151b5b1d51"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table, column in (("venues", "venue_id"), ("artists", "artist_id")):
+        op.add_column(table, sa.Column("deleted_at", sa.DateTime(), nullable=True))
+        op.create_index(
+            f"ix_{table}_deleted_at",
+            table,
+            ["deleted_at"],
+            postgresql_where=sa.text("deleted_at IS NOT NULL"),
+        )
+        # Constraint names are the Postgres defaults from the initial schema.
+        op.drop_constraint(f"shows_{column}_fkey", "shows", type_="foreignkey")
+        op.create_foreign_key(
+            f"shows_{column}_fkey",
+            "shows",
+            table,
+            [column],
+            ["id"],
+            ondelete="CASCADE",
+        )
+
+
+def downgrade():
+    for table, column in (("venues", "venue_id"), ("artists", "artist_id")):
+        op.drop_constraint(f"shows_{column}_fkey", "shows", type_="foreignkey")
+        op.create_foreign_key(f"shows_{column}_fkey", "shows", table, [column], ["id"])
+        op.drop_index(f"ix_{table}_deleted_at", table_name=table)
+        op.drop_column(table, "deleted_at")
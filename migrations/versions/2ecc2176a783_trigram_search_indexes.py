@@ -0,0 +1,35 @@
+"""trigram search indexes
+
+Revision ID: 2ecc2176a783
+Revises: d990486c952e
+Create Date: 2026-10-18 18:56:50.703973
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2ecc2176a783'
+down_revision = 'd990486c952e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for table in ("venues", "artists"):
+        for column in ("name", "city"):
+            op.create_index(
+                f"ix_{table}_{column}_trgm",
+                table,
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"},
+            )
+
+
+def downgrade():
+    for table in ("venues", "artists"):
+        for column in ("name", "city"):
+            op.drop_index(f"ix_{table}_{column}_trgm", table_name=table)
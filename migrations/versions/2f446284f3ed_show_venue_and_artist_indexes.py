@@ -0,0 +1,30 @@
+"""show venue and artist indexes
+
+Revision ID: 2f446284f3ed
+Revises: 04f13dd9818a
+Create Date: 2026-10-18 19:00:29.599331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2f446284f3ed'
+down_revision = '04f13dd9818a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_shows_venue_id_start_time", "shows", ["venue_id", "start_time"]
+    )
+    op.create_index(
+        "ix_shows_artist_id_start_time", "shows", ["artist_id", "start_time"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_shows_artist_id_start_time", table_name="shows")
+    op.drop_index("ix_shows_venue_id_start_time", table_name="shows")
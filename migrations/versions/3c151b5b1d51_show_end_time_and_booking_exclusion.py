@@ -0,0 +1,41 @@
+"""show end time and booking exclusion
+
+Revision ID: 3c151b5b1d51
+Revises: e11e72a5fec2
+Create Date: 2026-10-18 19:08:18.798255
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "3c151b5b1d51"
+down_revision = "e11e72a5fec2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("shows", sa.Column("end_time", sa.DateTime(), nullable=True))
+    # Existing shows get the default three hour slot.
+    op.execute("UPDATE shows SET end_time = start_time + interval '3 hours'")
+    op.alter_column("shows", "end_time", nullable=False)
+    op.create_check_constraint(
+        "shows_end_after_start", "shows", "end_time > start_time"
+    )
+    # Fails if existing shows already overlap; those must be moved first.
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    for column in ("venue_id", "artist_id"):
+        op.execute(
+            f"ALTER TABLE shows ADD CONSTRAINT shows_{column}_no_overlap "
+            f"EXCLUDE USING gist ({column} WITH =, "
+            "tsrange(start_time, end_time) WITH &&)"
+        )
+
+
+def downgrade():
+    for column in ("venue_id", "artist_id"):
+        op.drop_constraint(f"shows_{column}_no_overlap", "shows")
+    op.drop_constraint("shows_end_after_start", "shows")
+    op.drop_column("shows", "end_time")
@@ -0,0 +1,118 @@
+"""partition shows by month
+
+Revision ID: 4a2b956a66ee
+Revises: b2094ff0824a
+Create Date: 2026-10-18 19:29:54.507437
+
+"""
+
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "4a2b956a66ee"
+down_revision = "b2094ff0824a"
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    "ix_shows_start_time_id": "start_time, id",
+    "ix_shows_venue_id_start_time": "venue_id, start_time",
+    "ix_shows_artist_id_start_time": "artist_id, start_time",
+}
+# Months after the current one to create partitions for; later ones come
+# from `flask partitions create`.
+AHEAD = 12
+
+
+def add_exclusions(table):
+    for column in ("venue_id", "artist_id"):
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_no_overlap "
+            f"EXCLUDE USING gist ({column} WITH =, "
+            "tsrange(start_time, end_time) WITH &&)"
+        )
+
+
+def retire(table, name):
+    """Rename `table` to `name`, freeing the schema-wide names of its indexes."""
+    op.execute(f"ALTER TABLE {table} RENAME TO {name}")
+    op.execute(f"ALTER TABLE {name} RENAME CONSTRAINT shows_pkey TO {name}_pkey")
+    op.execute("ALTER SEQUENCE shows_id_seq OWNED BY NONE")
+    for index in INDEXES:
+        op.execute(f"DROP INDEX {index}")
+
+
+def create_table(name, primary_key, partition_by=""):
+    op.execute(f"""
+        CREATE TABLE {name} (
+            id integer NOT NULL DEFAULT nextval('shows_id_seq'),
+            start_time timestamp without time zone NOT NULL,
+            end_time timestamp without time zone NOT NULL,
+            venue_id integer NOT NULL
+                CONSTRAINT shows_venue_id_fkey REFERENCES venues (id) ON DELETE CASCADE,
+            artist_id integer NOT NULL
+                CONSTRAINT shows_artist_id_fkey REFERENCES artists (id) ON DELETE CASCADE,
+            CONSTRAINT shows_pkey PRIMARY KEY ({primary_key}),
+            CONSTRAINT shows_end_after_start CHECK (end_time > start_time)
+        ) {partition_by}
+        """)
+    for index, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {index} ON {name} ({columns})")
+
+
+def next_month(month):
+    return month.replace(
+        year=month.year + month.month // 12, month=month.month % 12 + 1
+    )
+
+
+def upgrade():
+    retire("shows", "shows_unpartitioned")
+    create_table("shows", "id, start_time", "PARTITION BY RANGE (start_time)")
+    op.execute("CREATE TABLE shows_default PARTITION OF shows DEFAULT")
+    add_exclusions("shows_default")
+
+    # A partition for every month from the first show to AHEAD months out.
+    first = (
+        op.get_bind()
+        .execute(sa.text("SELECT min(start_time) FROM shows_unpartitioned"))
+        .scalar()
+    )
+    now = datetime.now()
+    start = min(first or now, now)
+    month = datetime(start.year, start.month, 1)
+    last = datetime(now.year, now.month, 1)
+    for _ in range(AHEAD):
+        last = next_month(last)
+    while month <= last:
+        name, end = f"shows_{month:%Y_%m}", next_month(month)
+        op.execute(
+            f"CREATE TABLE {name} PARTITION OF shows "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+        add_exclusions(name)
+        month = end
+
+    op.execute(
+        "INSERT INTO shows (id, start_time, end_time, venue_id, artist_id) "
+        "SELECT id, start_time, end_time, venue_id, artist_id FROM shows_unpartitioned"
+    )
+    op.execute("DROP TABLE shows_unpartitioned")
+    op.execute("ALTER SEQUENCE shows_id_seq OWNED BY shows.id")
+    op.execute("ANALYZE shows")
+
+
+def downgrade():
+    # Archived partitions (in the `archive` schema) are left where they are.
+    retire("shows", "shows_partitioned")
+    create_table("shows", "id")
+    add_exclusions("shows")
+    op.execute(
+        "INSERT INTO shows (id, start_time, end_time, venue_id, artist_id) "
+        "SELECT id, start_time, end_time, venue_id, artist_id FROM shows_partitioned"
+    )
+    # Dropping the parent drops its partitions too.
+    op.execute("DROP TABLE shows_partitioned")
+    op.execute("ALTER SEQUENCE shows_id_seq OWNED BY shows.id")
@@ -0,0 +1,29 @@
+"""venue and artist versions
+
+Revision ID: 507a80ae39b2
+Revises: 2c73d1bcfe3a
+Create Date: 2026-10-18 19:14:27.840436
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "507a80ae39b2"
+down_revision = "2c73d1bcfe3a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("venues", "artists"):
+        op.add_column(
+            table,
+            sa.Column("version", sa.Integer(), nullable=False, server_default="1"),
+        )
+
+
+def downgrade():
+    for table in ("venues", "artists"):
+        op.drop_column(table, "version")
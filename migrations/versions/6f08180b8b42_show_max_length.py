@@ -0,0 +1,29 @@
+"""show max length
+
+Revision ID: 6f08180b8b42
+Revises: 7e3299537fe5
+Create Date: 2026-10-18 19:48:43.669471
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "6f08180b8b42"
+down_revision = "7e3299537fe5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Added to every attached partition too; partitions created later copy
+    # it with LIKE shows INCLUDING CONSTRAINTS. Fails if a show already
+    # runs longer, which forms and the importer have never accepted.
+    op.create_check_constraint(
+        "shows_max_length", "shows", "end_time - start_time <= interval '24 hours'"
+    )
+
+
+def downgrade():
+    op.drop_constraint("shows_max_length", "shows")
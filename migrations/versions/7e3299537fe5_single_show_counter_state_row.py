@@ -0,0 +1,31 @@
+"""single show counter state row
+
+Revision ID: 7e3299537fe5
+Revises: 4a2b956a66ee
+Create Date: 2026-10-18 19:47:03.117254
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "7e3299537fe5"
+down_revision = "4a2b956a66ee"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # counters.get_state now reads and creates only the row with id 1.
+    # Racing first callers may have added more; the oldest is the one
+    # that was read and advanced since.
+    op.execute(
+        "DELETE FROM show_counter_state "
+        "WHERE id > (SELECT min(id) FROM show_counter_state)"
+    )
+    op.execute("UPDATE show_counter_state SET id = 1")
+
+
+def downgrade():
+    pass
@@ -0,0 +1,36 @@
+"""venue locations
+
+Revision ID: b2094ff0824a
+Revises: 507a80ae39b2
+Create Date: 2026-10-18 19:26:41.569973
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "b2094ff0824a"
+down_revision = "507a80ae39b2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("venues", sa.Column("latitude", sa.Float(), nullable=True))
+    op.add_column("venues", sa.Column("longitude", sa.Float(), nullable=True))
+    op.add_column("venues", sa.Column("geohash", sa.String(length=12), nullable=True))
+    op.create_index(
+        "ix_venues_geohash",
+        "venues",
+        ["geohash"],
+        postgresql_ops={"geohash": "varchar_pattern_ops"},
+    )
+    # Existing venues get their locations from `flask geocode`.
+
+
+def downgrade():
+    op.drop_index("ix_venues_geohash", table_name="venues")
+    op.drop_column("venues", "geohash")
+    op.drop_column("venues", "longitude")
+    op.drop_column("venues", "latitude")
@@ -0,0 +1,24 @@
+"""show listing keyset index
+
+Revision ID: bc90ee54f194
+Revises: 2ecc2176a783
+Create Date: 2026-10-18 18:57:55.252695
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bc90ee54f194'
+down_revision = '2ecc2176a783'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_shows_start_time_id", "shows", ["start_time", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_shows_start_time_id", table_name="shows")
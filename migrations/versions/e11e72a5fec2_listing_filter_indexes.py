@@ -0,0 +1,30 @@
+"""listing filter indexes
+
+Revision ID: e11e72a5fec2
+Revises: 2f446284f3ed
+Create Date: 2026-10-18 19:05:55.495708
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e11e72a5fec2'
+down_revision = '2f446284f3ed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ("venues", "artists"):
+        op.create_index(
+            f"ix_{table}_genres", table, ["genres"], postgresql_using="gin"
+        )
+        op.create_index(f"ix_{table}_state_city", table, ["state", "city"])
+
+
+def downgrade():
+    for table in ("venues", "artists"):
+        op.drop_index(f"ix_{table}_state_city", table_name=table)
+        op.drop_index(f"ix_{table}_genres", table_name=table)
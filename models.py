@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, text
 
 db = SQLAlchemy()
 
@@ -9,28 +10,96 @@ db = SQLAlchemy()
 
 class Venue(db.Model):
     __tablename__ = "venues"
+    __table_args__ = (
+        db.Index(
+            "ix_venues_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "ix_venues_city_trgm",
+            "city",
+            postgresql_using="gin",
+            postgresql_ops={"city": "gin_trgm_ops"},
+        ),
+        db.Index("ix_venues_genres", "genres", postgresql_using="gin"),
+        db.Index("ix_venues_state_city", "state", "city"),
+        db.Index(
+            "ix_venues_deleted_at",
+            "deleted_at",
+            postgresql_where=db.text("deleted_at IS NOT NULL"),
+        ),
+        # Pattern ops so `geohash LIKE 'prefix%'` is an index range scan.
+        db.Index(
+            "ix_venues_geohash",
+            "geohash",
+            postgresql_ops={"geohash": "varchar_pattern_ops"},
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(), nullable=False)
     genres = db.Column(db.ARRAY(db.String()), nullable=False)
     address = db.Column(db.String(120), nullable=False)
     city = db.Column(db.String(120), nullable=False)
     state = db.Column(db.String(120), nullable=False)
+    # Located from city and state by geo.py; null if the gazetteer lacks it.
+    latitude = db.Column(db.Float)
+    longitude = db.Column(db.Float)
+    geohash = db.Column(db.String(12))
     phone = db.Column(db.String(120), nullable=False)
     website = db.Column(db.String(), nullable=False)
     facebook_link = db.Column(db.String(120), nullable=False)
     seeking_talent = db.Column(db.Boolean, nullable=False)
     seeking_description = db.Column(db.String())
     image_link = db.Column(db.String(500), nullable=False)
+    # Maintained by counters.py; see `flask counters`.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    # Bumped on every update; edits made against an older version are
+    # rejected (see updates.py).
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Set by a soft delete (see deletion.py); such rows are hidden from
+    # queries until `flask purge` removes them.
+    deleted_at = db.Column(db.DateTime)
+    # Shows are removed by the database's ON DELETE CASCADE.
     shows = db.relationship(
-        "Show", backref=db.backref("venue", cascade="all, delete", lazy=True)
+        "Show", backref=db.backref("venue", lazy=True), passive_deletes=True
     )
 
+    __mapper_args__ = {"version_id_col": version}
+
     def __repr__(self):
         return f"<Venue {self.id} {self.name}>"
 
 
 class Artist(db.Model):
     __tablename__ = "artists"
+    __table_args__ = (
+        db.Index(
+            "ix_artists_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        db.Index(
+            "ix_artists_city_trgm",
+            "city",
+            postgresql_using="gin",
+            postgresql_ops={"city": "gin_trgm_ops"},
+        ),
+        db.Index("ix_artists_genres", "genres", postgresql_using="gin"),
+        db.Index("ix_artists_state_city", "state", "city"),
+        db.Index(
+            "ix_artists_deleted_at",
+            "deleted_at",
+            postgresql_where=db.text("deleted_at IS NOT NULL"),
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(), nullable=False)
     genres = db.Column(db.ARRAY(db.String()), nullable=False)
@@ -42,7 +111,25 @@ class Artist(db.Model):
     seeking_venue = db.Column(db.Boolean, nullable=False)
     seeking_description = db.Column(db.String())
     image_link = db.Column(db.String(500), nullable=False)
-    shows = db.relationship("Show", backref=db.backref("artist", lazy=True))
+    # Maintained by counters.py; see `flask counters`.
+    upcoming_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    past_shows_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    # Bumped on every update; edits made against an older version are
+    # rejected (see updates.py).
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # Set by a soft delete (see deletion.py); such rows are hidden from
+    # queries until `flask purge` removes them.
+    deleted_at = db.Column(db.DateTime)
+    # Shows are removed by the database's ON DELETE CASCADE.
+    shows = db.relationship(
+        "Show", backref=db.backref("artist", lazy=True), passive_deletes=True
+    )
+
+    __mapper_args__ = {"version_id_col": version}
 
     def __repr__(self):
         return f"<Artist {self.id} {self.name}>"
@@ -50,7 +137,62 @@ class Artist(db.Model):
 
 class Show(db.Model):
     __tablename__ = "shows"
+    __table_args__ = (
+        db.Index("ix_shows_start_time_id", "start_time", "id"),
+        db.Index("ix_shows_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_shows_artist_id_start_time", "artist_id", "start_time"),
+        db.CheckConstraint("end_time > start_time", name="shows_end_after_start"),
+        # SHOW_MAX_HOURS may not exceed this; booking checks rely on it.
+        db.CheckConstraint(
+            "end_time - start_time <= interval '24 hours'", name="shows_max_length"
+        ),
+        # One partition per month of start_time; see partitions.py.
+        {"postgresql_partition_by": "RANGE (start_time)"},
+    )
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    # Part of the table's primary key only because Postgres requires the
+    # partition key in it; the mapper still identifies shows by id.
+    start_time = db.Column(db.DateTime, primary_key=True)
+    end_time = db.Column(db.DateTime, nullable=False)
+    venue_id = db.Column(
+        db.Integer, db.ForeignKey("venues.id", ondelete="CASCADE"), nullable=False
+    )
+    artist_id = db.Column(
+        db.Integer, db.ForeignKey("artists.id", ondelete="CASCADE"), nullable=False
+    )
+
+    __mapper_args__ = {"primary_key": [id]}
+
+
+# A venue or artist can't be booked twice at once. Postgres can't enforce
+# an exclusion constraint across partitions, so every partition gets these
+# (needs btree_gist). Overlaps between shows in two different months slip
+# past them. queries.booking_conflict catches those before insert, under
+# advisory locks that serialize bookings of the same venue or artist, but
+# only for writes that go through it: a show inserted any other way (raw
+# SQL, bench_partitions.py fill) is only checked against its own month.
+SHOW_PARTITION_CONSTRAINTS = [
+    f"ALTER TABLE {{partition}} ADD CONSTRAINT {{partition}}_{column}_no_overlap "
+    f"EXCLUDE USING gist ({column} WITH =, tsrange(start_time, end_time) WITH &&)"
+    for column in ("venue_id", "artist_id")
+]
+# Catches shows outside every monthly partition.
+SHOW_DEFAULT_PARTITION = "shows_default"
+
+
+@event.listens_for(Show.__table__, "after_create")
+def _create_default_partition(table, connection, **kw):
+    if connection.dialect.name == "postgresql":
+        connection.execute(
+            text(f"CREATE TABLE {SHOW_DEFAULT_PARTITION} PARTITION OF shows DEFAULT")
+        )
+        for statement in SHOW_PARTITION_CONSTRAINTS:
+            connection.execute(text(statement.format(partition=SHOW_DEFAULT_PARTITION)))
+
+
+class ShowCounterState(db.Model):
+    """Single row holding the time up to which show counters were rolled over."""
+
+    __tablename__ = "show_counter_state"
     id = db.Column(db.Integer, primary_key=True)
-    start_time = db.Column(db.DateTime, nullable=False)
-    venue_id = db.Column(db.Integer, db.ForeignKey("venues.id"), nullable=False)
-    artist_id = db.Column(db.Integer, db.ForeignKey("artists.id"), nullable=False)
+    rolled_over_at = db.Column(db.DateTime, nullable=False)
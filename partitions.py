@@ -0,0 +1,228 @@
+"""Monthly partitions of the shows table.
+
+`shows` is range-partitioned on start_time: one partition per calendar
+month (`shows_2026_10`), plus `shows_default` for shows outside all of
+them. Queries bounded by start_time, such as upcoming shows, the counters
+rollover, booking checks and calendars, only read the partitions of
+their range.
+
+`flask partitions create --ahead 12` adds the partitions for this and the
+coming months. Schedule it (e.g. monthly from cron) so new bookings don't
+pile up in the default partition; rows already there for a new month are
+moved into it. `flask partitions archive --keep 24` takes the partitions
+of months before that off the table, along with any older shows left in
+the default partition: their shows leave the venue and artist counters
+and pages, and the tables move to the `archive` schema (the default
+partition's rows into `archive.shows_default`), or are dropped with
+--drop. A month archived before has its new rows appended to its table
+there. `flask partitions list` shows what exists.
+"""
+
+import re
+from datetime import datetime, timedelta
+import click
+from flask.cli import AppGroup
+from sqlalchemy import text
+from availability import month_start, next_month
+from models import db, Show, SHOW_DEFAULT_PARTITION, SHOW_PARTITION_CONSTRAINTS
+import availability
+import cache
+import counters
+
+partitions_cli = AppGroup("partitions", help="Manage the monthly partitions of shows.")
+
+PARTITION_NAME = re.compile(r"^shows_(\d{4})_(\d{2})$")
+ARCHIVE_SCHEMA = "archive"
+
+
+def partition_name(month):
+    return f"shows_{month:%Y_%m}"
+
+
+def partitions():
+    """{first instant of the month: (name, estimated rows)} of shows' partitions."""
+    rows = db.session.execute(
+        text(
+            "SELECT c.relname, c.reltuples FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'shows'::regclass"
+        )
+    )
+    found = {}
+    for name, estimate in rows:
+        match = PARTITION_NAME.match(name)
+        if match:
+            month = datetime(int(match.group(1)), int(match.group(2)), 1)
+            found[month] = (name, max(int(estimate), 0))
+    return found
+
+
+def create(month):
+    """Attach the partition for `month`, moving its shows out of the default one.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    name = partition_name(month)
+    start, end = month, next_month(month)
+    db.session.execute(
+        text(
+            f"CREATE TABLE {name} "
+            "(LIKE shows INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    for statement in SHOW_PARTITION_CONSTRAINTS:
+        db.session.execute(text(statement.format(partition=name)))
+    # Attaching fails while the default partition holds rows of the range.
+    db.session.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {SHOW_DEFAULT_PARTITION} "
+            "WHERE start_time >= :start AND start_time < :end RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    db.session.execute(
+        text(
+            f"ALTER TABLE shows ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+    )
+
+
+def archive(month, name, drop=False):
+    """Detach the partition `name` of `month` and archive or drop it.
+
+    Its shows are uncounted and the pages showing them invalidated.
+    """
+    start, end = month, next_month(month)
+    criteria = (Show.start_time >= start, Show.start_time < end)
+    pairs = db.session.query(Show.venue_id, Show.artist_id).filter(*criteria)
+    venue_ids, artist_ids = set(), set()
+    for venue_id, artist_id in pairs.distinct():
+        venue_ids.add(venue_id)
+        artist_ids.add(artist_id)
+    counters.record_removed(*criteria)
+    db.session.execute(text(f"ALTER TABLE shows DETACH PARTITION {name}"))
+    if drop:
+        db.session.execute(text(f"DROP TABLE {name}"))
+    else:
+        db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        archived = db.session.execute(
+            text("SELECT to_regclass(:name)"), {"name": f"{ARCHIVE_SCHEMA}.{name}"}
+        ).scalar()
+        if archived is None:
+            db.session.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+            # Nothing is added to it by id, and the default would tie it
+            # to shows' id sequence.
+            db.session.execute(
+                text(f"ALTER TABLE {ARCHIVE_SCHEMA}.{name} ALTER id DROP DEFAULT")
+            )
+        else:
+            # The month was archived before, then got a partition again.
+            db.session.execute(
+                text(f"INSERT INTO {ARCHIVE_SCHEMA}.{name} SELECT * FROM {name}")
+            )
+            db.session.execute(text(f"DROP TABLE {name}"))
+    db.session.commit()
+    cache.invalidate(venue_ids=venue_ids, artist_ids=artist_ids)
+    availability.invalidate((venue_id, start, end) for venue_id in venue_ids)
+
+
+def archive_default(before, drop=False):
+    """Take the default partition's shows starting before `before` off shows.
+
+    As archive() does for a month: they are uncounted, the pages showing
+    them invalidated, and they move to the archive schema unless `drop`.
+    Returns how many there were.
+    """
+    moved = (
+        f"DELETE FROM {SHOW_DEFAULT_PARTITION} "
+        "WHERE start_time < :before RETURNING *"
+    )
+    if not drop:
+        db.session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+        db.session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.{SHOW_DEFAULT_PARTITION} "
+                "(LIKE shows)"
+            )
+        )
+        moved = (
+            f"WITH moved AS ({moved}) INSERT INTO "
+            f"{ARCHIVE_SCHEMA}.{SHOW_DEFAULT_PARTITION} SELECT * FROM moved "
+            "RETURNING *"
+        )
+    shows = db.session.execute(text(moved), {"before": before}).all()
+    counters.record_shows(shows, -1)
+    db.session.commit()
+    cache.invalidate(
+        venue_ids={show.venue_id for show in shows},
+        artist_ids={show.artist_id for show in shows},
+    )
+    availability.invalidate(
+        (show.venue_id, show.start_time, show.end_time) for show in shows
+    )
+    return len(shows)
+
+
+@partitions_cli.command("create")
+@click.option(
+    "--ahead", default=12, show_default=True, help="Months after this one to cover."
+)
+def create_command(ahead):
+    """Create the partitions of this and the coming months."""
+    existing = partitions()
+    month = month_start(datetime.now())
+    created = 0
+    for _ in range(ahead + 1):
+        if month not in existing:
+            create(month)
+            db.session.commit()
+            click.echo(f"Created {partition_name(month)}.")
+            created += 1
+        month = next_month(month)
+    click.echo(f"{created} partitions created.")
+
+
+@partitions_cli.command("archive")
+@click.option(
+    "--keep",
+    default=24,
+    show_default=True,
+    help="Months before this one whose partitions stay attached.",
+)
+@click.option(
+    "--drop",
+    is_flag=True,
+    help=f"Drop them instead of moving them to {ARCHIVE_SCHEMA}.",
+)
+def archive_command(keep, drop):
+    """Detach the partitions of months older than --keep."""
+    cutoff = month_start(datetime.now())
+    for _ in range(keep):
+        cutoff = month_start(cutoff - timedelta(days=1))
+    archived = 0
+    for month, (name, estimate) in sorted(partitions().items()):
+        if month < cutoff:
+            archive(month, name, drop)
+            click.echo(
+                f"{'Dropped' if drop else 'Archived'} {name} (~{estimate} shows)."
+            )
+            archived += 1
+    click.echo(f"{archived} partitions before {cutoff:%Y-%m} taken off shows.")
+    moved = archive_default(cutoff, drop)
+    click.echo(
+        f"{moved} older shows {'dropped' if drop else 'archived'} "
+        f"from {SHOW_DEFAULT_PARTITION}."
+    )
+
+
+@partitions_cli.command("list")
+def list_command():
+    """List the monthly partitions and their estimated sizes."""
+    for month, (name, estimate) in sorted(partitions().items()):
+        click.echo(f"{name}  {month:%Y-%m}  ~{estimate} shows")
+    default = db.session.execute(
+        text(f"SELECT count(*) FROM {SHOW_DEFAULT_PARTITION}")
+    ).scalar()
+    click.echo(f"{SHOW_DEFAULT_PARTITION}  {default} shows")
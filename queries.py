@@ -0,0 +1,239 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, select
+from models import db, Venue, Artist, Show
+from asyncdb import gather
+import cache
+
+# ----------------------------------------------------------------------------#
+# Queries shared by the HTML views and the JSON API.
+# ----------------------------------------------------------------------------#
+
+# SQLSTATE Postgres raises when an exclusion constraint rejects a row.
+EXCLUSION_VIOLATION = "23P01"
+# First key of the advisory lock booking_conflict takes on a venue or an
+# artist; the second is its id.
+BOOKING_LOCKS = {"venue": 1, "artist": 2}
+
+
+def booked_ids(key, id, other):
+    """Ids in column `other` of the shows whose `key` equals `id`.
+
+    E.g. the artists that have played a venue, whose pages show its name.
+    """
+    return [row[0] for row in db.session.query(other).filter(key == id).distinct()]
+
+
+def booking_conflict(show):
+    """Message describing a show clashing with `show`'s venue or artist, or None.
+
+    Shows never run longer than SHOW_MAX_HOURS, so any overlapping show
+    starts inside a window that long before `show` ends. That keeps each
+    check a short range scan of the (venue_id, start_time) or
+    (artist_id, start_time) index however many shows exist.
+
+    The per-partition exclusion constraints can't see a clash with a show
+    in another month, so the check first takes transaction-level advisory
+    locks on the venue and the artist (always in that order). They are
+    held until the caller commits or rolls back, so a concurrent booking
+    of either waits here and then sees this one.
+    """
+    sides = ((Show.venue_id, "venue"), (Show.artist_id, "artist"))
+    for key, label in sides:
+        db.session.execute(
+            select(
+                func.pg_advisory_xact_lock(BOOKING_LOCKS[label], getattr(show, key.key))
+            )
+        )
+    earliest = show.start_time - timedelta(hours=current_app.config["SHOW_MAX_HOURS"])
+    for key, label in sides:
+        clash = (
+            db.session.query(Show.start_time, Show.end_time)
+            .filter(
+                key == getattr(show, key.key),
+                Show.start_time > earliest,
+                Show.start_time < show.end_time,
+                Show.end_time > show.start_time,
+            )
+            .first()
+        )
+        if clash:
+            return (
+                f"The {label} is already booked from "
+                f"{clash.start_time:%Y-%m-%d %H:%M} to "
+                f"{clash.end_time:%Y-%m-%d %H:%M}."
+            )
+    return None
+
+
+def details_ttl(details):
+    """Cache lifetime for a venue/artist page: until its next show starts.
+
+    At that point the show moves from upcoming to past and the cached split
+    is stale, so the entry must not outlive it.
+    """
+    ttl = current_app.config["CACHE_TTL"]
+    if details["upcoming_shows"]:
+        next_show = min(show["start_time"] for show in details["upcoming_shows"])
+        ttl = min(ttl, (next_show - datetime.now()).total_seconds())
+    return max(ttl, 0)
+
+
+def venue_details(venue_id):
+    """Detail dict for a venue page, read through the cache; None if missing."""
+    key = cache.venue_key(venue_id)
+    venue = cache.get(key)
+    if venue is None:
+        venue = get_venue(venue_id)
+        if venue is not None:
+            cache.set(key, venue, ttl=details_ttl(venue))
+    return venue
+
+
+def artist_details(artist_id):
+    """Detail dict for an artist page, read through the cache; None if missing."""
+    key = cache.artist_key(artist_id)
+    artist = cache.get(key)
+    if artist is None:
+        artist = get_artist(artist_id)
+        if artist is not None:
+            cache.set(key, artist, ttl=details_ttl(artist))
+    return artist
+
+
+def show_statement(key, id, other, columns):
+    """Statement for the shows whose `key` is `id`, ordered by start time.
+
+    Selects `columns` of the `other` side and the start time, read in
+    order from the (key, start_time) index of each monthly partition.
+    """
+    return (
+        db.session.query(Show)
+        .join(other)
+        .filter(key == id)
+        .with_entities(*columns, Show.start_time)
+        .order_by(Show.start_time)
+        .statement
+    )
+
+
+def split_shows(shows, now):
+    """(past, upcoming) parts of `shows`, which are ordered by start time."""
+    first = next(
+        (n for n, show in enumerate(shows) if show.start_time > now), len(shows)
+    )
+    return shows[:first], shows[first:]
+
+
+def get_venue(venue_id):
+    # The venue row and its shows don't depend on each other: fetch all at once.
+    venues, shows = gather(
+        db.session.query(Venue)
+        .with_entities(
+            Venue.id,
+            Venue.name,
+            Venue.genres,
+            Venue.address,
+            Venue.city,
+            Venue.state,
+            Venue.phone,
+            Venue.website,
+            Venue.facebook_link,
+            Venue.seeking_talent,
+            Venue.seeking_description,
+            Venue.image_link,
+            Venue.version,
+        )
+        .filter_by(id=venue_id)
+        .statement,
+        show_statement(
+            Show.venue_id, venue_id, Artist, (Artist.id, Artist.name, Artist.image_link)
+        ),
+    )
+    if not venues:
+        return None
+    past, upcoming = split_shows(shows, datetime.now())
+    (
+        Id,
+        name,
+        genres,
+        address,
+        city,
+        state,
+        phone,
+        website,
+        facebook_link,
+        seeking_talent,
+        seeking_description,
+        image_link,
+        version,
+    ) = venues[0]
+    venue = {
+        "id": Id,
+        "name": name,
+        "genres": genres,
+        "address": address,
+        "city": city,
+        "state": state,
+        "phone": phone,
+        "website": website,
+        "facebook_link": facebook_link,
+        "seeking_talent": seeking_talent,
+        "seeking_description": seeking_description,
+        "image_link": image_link,
+        "version": version,
+    }
+    for name, shows in (("past_shows", past), ("upcoming_shows", upcoming)):
+        venue[name] = [
+            {
+                "artist_id": show[0],
+                "artist_name": show[1],
+                "artist_image_link": show[2],
+                "start_time": show[3],
+            }
+            for show in shows
+        ]
+    venue["past_shows_count"] = len(venue["past_shows"])
+    venue["upcoming_shows_count"] = len(venue["upcoming_shows"])
+    return venue
+
+
+def get_artist(artist_id):
+    artists, shows = gather(
+        db.session.query(Artist).filter_by(id=artist_id).statement,
+        show_statement(
+            Show.artist_id, artist_id, Venue, (Venue.id, Venue.name, Venue.image_link)
+        ),
+    )
+    if not artists:
+        return None
+    past, upcoming = split_shows(shows, datetime.now())
+    artist = artists[0][0]
+    data = {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": artist.genres,
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "version": artist.version,
+    }
+    for name, shows in (("past_shows", past), ("upcoming_shows", upcoming)):
+        data[name] = [
+            {
+                "venue_id": show.id,
+                "venue_name": show.name,
+                "venue_image_link": show.image_link,
+                "start_time": show.start_time,
+            }
+            for show in shows
+        ]
+    data["past_shows_count"] = len(data["past_shows"])
+    data["upcoming_shows_count"] = len(data["upcoming_shows"])
+
+    return data
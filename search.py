@@ -0,0 +1,39 @@
+from sqlalchemy import func, or_
+from models import db
+from asyncdb import gather
+
+# ----------------------------------------------------------------------------#
+# Search.
+# ----------------------------------------------------------------------------#
+
+# Columns matched by a search term, in ranking order.
+SEARCH_FIELDS = ("name", "city")
+
+
+def search(model, keyword, page, per_page, count_limit):
+    """Return one page of ranked (id, name) hits for `keyword` and a capped total.
+
+    The match is an ILIKE served by the pg_trgm GIN indexes, and hits are
+    ranked by trigram similarity.
+    """
+    pattern = f"%{keyword}%"
+    query = db.session.query(model.id, model.name).filter(
+        or_(*(getattr(model, f).ilike(pattern) for f in SEARCH_FIELDS))
+    )
+    rows, counts = gather(
+        query.order_by(func.similarity(model.name, keyword).desc(), model.id)
+        .limit(per_page + 1)
+        .offset((page - 1) * per_page)
+        .statement,
+        db.session.query(func.count())
+        .select_from(query.limit(count_limit + 1).subquery())
+        .statement,
+    )
+    count = counts[0][0]
+    return {
+        "count": f"{count_limit}+" if count > count_limit else count,
+        "page": page,
+        "has_prev": page > 1,
+        "has_next": len(rows) > per_page,
+        "rows": rows[:per_page],
+    }
@@ -0,0 +1,196 @@
+"""`flask seed`: fill the database with synthetic venues, artists and shows.
+
+Volumes are set per table, and popularity is skewed the way real listings
+are: a Zipf distribution with exponent `--skew` decides which cities get
+the most venues and artists, which genres are common, and which venues
+and artists get most of the shows. Shows are spread over the past and
+coming year, one evening slot per venue and artist per day, so they never
+break the double-booking constraints.
+
+Rows go through the `flask import` validation and batch insert, so the
+show counters, caches and venue locations stay consistent. `--seed` makes a
+run reproducible.
+"""
+
+import random
+from itertools import accumulate
+from datetime import datetime, time as day_time, timedelta
+import click
+from flask.cli import with_appcontext
+from enums import Genre
+from importer import IMPORTS, insert
+from models import db, Venue, Artist
+
+# (city, state) pairs, most populous first; all states are `enums.State` names.
+CITIES = [
+    ("New York", "NY"),
+    ("Los Angeles", "CA"),
+    ("Chicago", "IL"),
+    ("Houston", "TX"),
+    ("Phoenix", "AZ"),
+    ("Philadelphia", "PA"),
+    ("San Antonio", "TX"),
+    ("San Diego", "CA"),
+    ("Dallas", "TX"),
+    ("Austin", "TX"),
+    ("Jacksonville", "FL"),
+    ("San Francisco", "CA"),
+    ("Columbus", "OH"),
+    ("Seattle", "WA"),
+    ("Denver", "CO"),
+    ("Nashville", "TN"),
+    ("Boston", "MA"),
+    ("Detroit", "MI"),
+    ("Portland", "OR"),
+    ("Las Vegas", "NV"),
+    ("Memphis", "TN"),
+    ("Atlanta", "GA"),
+    ("Miami", "FL"),
+    ("Minneapolis", "MN"),
+    ("New Orleans", "LA"),
+]
+VENUE_WORDS = (
+    ["The Blue", "Golden", "Velvet", "Old", "Red", "Silver", "Underground"],
+    ["Room", "Lounge", "Hall", "Theatre", "Cellar", "Garden", "Warehouse"],
+)
+ARTIST_WORDS = (
+    ["The", "Midnight", "Electric", "Wild", "Lonely", "Brass", "Paper"],
+    ["Owls", "Rivers", "Engines", "Saints", "Foxes", "Lanterns", "Ghosts"],
+)
+SHOW_HOUR = 20
+SHOW_HOURS = 3
+SLOT_ATTEMPTS = 20
+
+
+def zipf_weights(n, skew):
+    return [1 / rank**skew for rank in range(1, n + 1)]
+
+
+class Generator:
+    def __init__(self, rng, skew):
+        self.rng = rng
+        self.city_weights = zipf_weights(len(CITIES), skew)
+        self.genres = [genre.name for genre in Genre]
+        self.genre_weights = zipf_weights(len(self.genres), skew)
+
+    def listing(self, words, n):
+        rng = self.rng
+        city, state = rng.choices(CITIES, self.city_weights)[0]
+        genres = set(rng.choices(self.genres, self.genre_weights, k=rng.randint(1, 3)))
+        name = f"{rng.choice(words[0])} {rng.choice(words[1])} {n}"
+        slug = name.lower().replace(" ", "-")
+        return {
+            "name": name,
+            "city": city,
+            "state": state,
+            "phone": f"{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}",
+            "genres": sorted(genres),
+            "image_link": f"https://images.example.com/{slug}.jpg",
+            "facebook_link": f"https://www.facebook.com/{slug}",
+            "website": f"https://{slug}.example.com",
+            "seeking_description": "Looking for new acts.",
+        }
+
+    def venue(self, n):
+        record = self.listing(VENUE_WORDS, n)
+        record["address"] = f"{self.rng.randint(1, 2000)} Main Street"
+        record["seeking_talent"] = self.rng.random() < 0.3
+        return record
+
+    def artist(self, n):
+        record = self.listing(ARTIST_WORDS, n)
+        record["seeking_venue"] = self.rng.random() < 0.3
+        return record
+
+    def shows(self, n, venue_ids, artist_ids, skew, days):
+        """Up to `n` shows; fewer if the busiest venues/artists run out of days."""
+        rng = self.rng
+        # Cumulative once, instead of on every choices() call.
+        venue_weights = list(accumulate(zipf_weights(len(venue_ids), skew)))
+        artist_weights = list(accumulate(zipf_weights(len(artist_ids), skew)))
+        today = datetime.combine(datetime.today(), day_time(SHOW_HOUR))
+        venue_days, artist_days = set(), set()
+        for _ in range(n):
+            for _ in range(SLOT_ATTEMPTS):
+                venue_id = rng.choices(venue_ids, cum_weights=venue_weights)[0]
+                artist_id = rng.choices(artist_ids, cum_weights=artist_weights)[0]
+                day = rng.randint(-days, days)
+                venue_free = (venue_id, day) not in venue_days
+                if venue_free and (artist_id, day) not in artist_days:
+                    break
+            else:
+                continue
+            venue_days.add((venue_id, day))
+            artist_days.add((artist_id, day))
+            start_time = today + timedelta(days=day)
+            yield {
+                "venue_id": venue_id,
+                "artist_id": artist_id,
+                "start_time": start_time,
+                "end_time": start_time + timedelta(hours=SHOW_HOURS),
+            }
+
+
+def load(table, records, batch_size):
+    """Validate and insert `records` as `flask import` would; returns the count."""
+    kind = IMPORTS[table]()
+    kind.prepare()
+
+    def reject(line, record, error):
+        raise click.ClickException(f"Generated {table} row rejected: {error}")
+
+    inserted, batch = 0, []
+    for n, record in enumerate(records):
+        batch.append((n, kind.clean(record)))
+        if len(batch) >= batch_size:
+            inserted += insert(kind, batch, reject)
+            batch = []
+    if batch:
+        inserted += insert(kind, batch, reject)
+    return inserted
+
+
+@click.command("seed")
+@click.option("--venues", default=1000, show_default=True)
+@click.option("--artists", default=5000, show_default=True)
+@click.option("--shows", default=50000, show_default=True)
+@click.option(
+    "--skew", default=1.1, show_default=True, help="Zipf exponent of popularity."
+)
+@click.option(
+    "--days", default=365, show_default=True, help="Shows fall within ±DAYS of today."
+)
+@click.option("--seed", type=int, help="Random seed, for a reproducible dataset.")
+@click.option("--batch-size", default=5000, show_default=True)
+@with_appcontext
+def seed_command(venues, artists, shows, skew, days, seed, batch_size):
+    """Generate synthetic venues, artists and shows."""
+    generator = Generator(random.Random(seed), skew)
+    offset = db.session.query(Venue.id).count()
+    inserted = load(
+        "venues", (generator.venue(offset + n) for n in range(venues)), batch_size
+    )
+    click.echo(f"{inserted} venues.")
+    offset = db.session.query(Artist.id).count()
+    inserted = load(
+        "artists", (generator.artist(offset + n) for n in range(artists)), batch_size
+    )
+    click.echo(f"{inserted} artists.")
+    # Existing shows' slots are unknown to the generator, so only seed
+    # shows between the venues and artists created by this run.
+    venue_ids = [
+        id for id, in db.session.query(Venue.id).order_by(Venue.id.desc()).limit(venues)
+    ]
+    artist_ids = [
+        id
+        for id, in db.session.query(Artist.id).order_by(Artist.id.desc()).limit(artists)
+    ]
+    if shows and venue_ids and artist_ids:
+        generator.rng.shuffle(venue_ids)
+        generator.rng.shuffle(artist_ids)
+        inserted = load(
+            "shows",
+            generator.shows(shows, venue_ids, artist_ids, skew, days),
+            batch_size,
+        )
+        click.echo(f"{inserted} shows.")
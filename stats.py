@@ -0,0 +1,42 @@
+from sqlalchemy import case, func
+from models import db, Show
+
+# ----------------------------------------------------------------------------#
+# Show statistics.
+# ----------------------------------------------------------------------------#
+
+
+def upcoming_show_counts(model, ids):
+    """Return {id: number of upcoming shows} for a batch of ids in one query.
+
+    Reads the counters maintained by `counters`, so nothing is aggregated.
+    """
+    if not ids:
+        return {}
+    rows = (
+        db.session.query(model.id, model.upcoming_shows_count)
+        .filter(model.id.in_(ids))
+        .all()
+    )
+    counts = dict.fromkeys(ids, 0)
+    counts.update(rows)
+    return counts
+
+
+def show_counts(key, boundary, *criteria):
+    """Count shows per `key` (e.g. `Show.venue_id`) on each side of `boundary`.
+
+    Returns ({id: upcoming}, {id: past}) computed in one grouped query over
+    the shows matching `criteria`.
+    """
+    upcoming = func.sum(case((Show.start_time > boundary, 1), else_=0))
+    rows = (
+        db.session.query(key, upcoming, func.count(Show.id))
+        .filter(*criteria)
+        .group_by(key)
+        .all()
+    )
+    return (
+        {id: n for id, n, total in rows},
+        {id: total - n for id, n, total in rows},
+    )
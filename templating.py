@@ -0,0 +1,83 @@
+"""Template compilation and fragment caching.
+
+Compiled templates are kept as bytecode under `JINJA_BYTECODE_CACHE_DIR`
+(default `instance/jinja_bytecode`), so a new worker loads them instead of
+parsing and compiling every template again. `flask templates warm`
+compiles them all ahead of time, e.g. after a deploy.
+
+The `{% cache key, ttl %}...{% endcache %}` tag renders its body once and
+reuses the output from an in-process LRU until `ttl` seconds (default
+`FRAGMENT_CACHE_TTL`) pass. `key` is any hashable value, typically a tuple
+of what the body depends on besides venue/artist/show data:
+
+    {% cache ("venue-area", area.city, area.state, request.query_string) %}
+
+That data is covered by `cache.data_version()`, which is part of every
+stored key and moves on with each write, so edits show up immediately.
+"""
+
+import os
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+import cache
+
+templates_cli = AppGroup("templates", help="Manage compiled templates.")
+
+_fragments = None
+
+
+class FragmentCache(Extension):
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render", args), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        key = (cache.data_version(), key)
+        fragment = _fragments.get(key)
+        if fragment is None:
+            fragment = str(caller())
+            _fragments.set(key, fragment, ttl)
+        return Markup(fragment)
+
+
+def stats():
+    return _fragments.stats()
+
+
+@templates_cli.command("warm")
+@with_appcontext
+def warm_command():
+    """Compile every template into the bytecode cache."""
+    env = current_app.jinja_env
+    names = env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        env.get_template(name)
+    click.echo(f"Compiled {len(names)} templates.")
+
+
+def init_app(app):
+    global _fragments
+    _fragments = cache.LRUCache(
+        app.config["FRAGMENT_CACHE_MAX_ENTRIES"], app.config["FRAGMENT_CACHE_TTL"]
+    )
+    directory = app.config["JINJA_BYTECODE_CACHE_DIR"] or os.path.join(
+        app.instance_path, "jinja_bytecode"
+    )
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    app.jinja_env.add_extension(FragmentCache)
+    app.cli.add_command(templates_cli)
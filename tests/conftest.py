@@ -0,0 +1,111 @@
+"""Fixtures shared by the tests.
+
+Tests that touch the database run against the Postgres database named by
+TEST_DATABASE_URL, e.g. postgresql://postgres@localhost:5432/fyyur_test,
+whose tables are dropped and created again for each test; without it
+they are skipped. The other tests run anywhere.
+"""
+
+import os
+import random
+from datetime import timedelta
+import pytest
+from sqlalchemy import text
+from app import create_app
+from bench import QUERY_COUNT
+from models import db, Venue, Artist, Show
+from seed import Generator
+import cache
+import counters
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture(scope="session")
+def app():
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        # Never the development database; nothing connects without one.
+        SQLALCHEMY_DATABASE_URI=TEST_DATABASE_URL or "postgresql://",
+    )
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def database(app):
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    with app.app_context():
+        for extension in ("pg_trgm", "btree_gist"):
+            db.session.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+        db.session.commit()
+        db.drop_all()
+        db.create_all()
+        # Ids start again from 1, so nothing cached may outlive a test.
+        cache.init_app(app)
+        yield db
+        db.session.remove()
+
+
+@pytest.fixture
+def make_venues(database):
+    """Add `n` generated venues (with `fields` overriding) and return them."""
+    generator = Generator(random.Random(1), 1.1)
+
+    def make(n, **fields):
+        venues = [Venue(**{**generator.venue(i), **fields}) for i in range(n)]
+        db.session.add_all(venues)
+        db.session.commit()
+        return venues
+
+    return make
+
+
+@pytest.fixture
+def make_artists(database):
+    """Add `n` generated artists (with `fields` overriding) and return them."""
+    generator = Generator(random.Random(2), 1.1)
+
+    def make(n, **fields):
+        artists = [Artist(**{**generator.artist(i), **fields}) for i in range(n)]
+        db.session.add_all(artists)
+        db.session.commit()
+        return artists
+
+    return make
+
+
+@pytest.fixture
+def make_show(database):
+    """Book a counted show of `hours` for a venue and artist at `start_time`."""
+
+    def make(venue, artist, start_time, hours=3):
+        show = Show(
+            venue_id=venue.id,
+            artist_id=artist.id,
+            start_time=start_time,
+            end_time=start_time + timedelta(hours=hours),
+        )
+        db.session.add(show)
+        counters.record_show(show)
+        db.session.commit()
+        return show
+
+    return make
+
+
+@pytest.fixture
+def query_count():
+    """SQL statements a response ran, from its Server-Timing header."""
+
+    def count(response):
+        return int(QUERY_COUNT.search(response.headers["Server-Timing"]).group(1))
+
+    return count
@@ -0,0 +1,129 @@
+from datetime import datetime, timedelta
+import pytest
+from api import encode_cursor
+from models import Venue
+import deletion
+
+
+@pytest.mark.parametrize(
+    "path, values",
+    [
+        ("/api/venues", 5),
+        ("/api/venues", []),
+        ("/api/venues", [1, 2]),
+        ("/api/venues", ["1"]),
+        ("/api/venues", [True]),
+        ("/api/shows", ["2031-05-01T21:30:00"]),
+        ("/api/shows", [1, "2031-05-01T21:30:00"]),
+        ("/api/shows", ["tomorrow", 1]),
+        ("/api/shows", {"after": 1}),
+    ],
+)
+def test_malformed_cursors_are_bad_requests(client, path, values):
+    response = client.get(path, query_string={"cursor": encode_cursor(values)})
+    assert response.status_code == 400
+    assert response.json == {"error": "Invalid cursor."}
+
+
+def test_shows_page_through_the_cursor(client, make_venues, make_artists, make_show):
+    (venue,), artists = make_venues(1), make_artists(3)
+    start = datetime(2031, 5, 1, 20)
+    shows = [
+        make_show(venue, artist, start + timedelta(days=n))
+        for n, artist in enumerate(artists)
+    ]
+    seen, cursor = [], None
+    while True:
+        args = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/shows", query_string=args).json
+        seen += [show["id"] for show in body["data"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [show.id for show in shows]
+
+
+def test_shows_of_soft_deleted_venues_are_hidden(
+    app, client, monkeypatch, make_venues, make_artists, make_show
+):
+    monkeypatch.setitem(app.config, "SOFT_DELETE", True)
+    venues, (artist,) = make_venues(2), make_artists(1)
+    start = datetime(2031, 5, 1, 20)
+    gone = make_show(venues[0], artist, start)
+    kept = make_show(venues[1], artist, start + timedelta(days=1))
+    assert deletion.delete(Venue, venues[0].id)
+
+    for fields in ("id", "id,venue_name"):
+        body = client.get("/api/shows", query_string={"fields": fields}).json
+        assert [show["id"] for show in body["data"]] == [kept.id]
+    assert client.get(f"/api/shows/{gone.id}").status_code == 404
+
+
+def test_json_is_compact_with_iso_datetimes(app):
+    body = {"name": "Café", "start_time": datetime(2031, 5, 1, 21, 30), 1: None}
+    assert app.json.dumps(body) == (
+        '{"name":"Café","start_time":"2031-05-01T21:30:00","1":null}'
+    )
+
+
+@pytest.fixture
+def token(app, monkeypatch):
+    monkeypatch.setitem(app.config, "API_TOKEN", "secret")
+    return {"Authorization": "Bearer secret"}
+
+
+def test_patch_bumps_the_version(client, token, make_venues):
+    (venue,) = make_venues(1)
+    path = f"/api/venues/{venue.id}"
+    body = {"version": 1, "name": "The Loft", "seeking_talent": False}
+    response = client.patch(path, json=body, headers=token)
+    assert response.status_code == 200
+    assert response.json["name"] == "The Loft"
+    assert response.json["version"] == 2
+    assert response.json["seeking_description"] is None
+
+    response = client.patch(path, json={"version": 1, "name": "x"}, headers=token)
+    assert response.status_code == 409
+    assert "version 2 is current" in response.json["error"]
+    assert client.patch("/api/venues/0", json=body, headers=token).status_code == 404
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"phone": 5555555555},
+        {"image_link": 5},
+        {"name": ["x"]},
+        {"name": None},
+        {"genres": "Jazz"},
+        {"genres": [1]},
+        {"seeking_talent": "yes"},
+        {"website": "not a url"},
+        {"bogus": "x"},
+    ],
+)
+def test_patch_rejects_bad_values(client, token, make_venues, changes):
+    (venue,) = make_venues(1)
+    response = client.patch(
+        f"/api/venues/{venue.id}", json={"version": 1, **changes}, headers=token
+    )
+    assert response.status_code == 400
+    assert next(iter(changes)) in response.json["error"]
+
+
+def test_bulk_patch_updates_every_match(client, token, make_artists):
+    austin = [artist.id for artist in make_artists(2, city="Austin", state="TX")]
+    make_artists(1, city="Dallas", state="TX")
+    body = {"where": {"city": "Austin"}, "set": {"seeking_venue": True}}
+    response = client.patch("/api/artists", json=body, headers=token)
+    assert response.status_code == 200
+    assert response.json["updated"] == 2
+    assert sorted(row["id"] for row in response.json["data"]) == sorted(austin)
+    assert {row["version"] for row in response.json["data"]} == {2}
+
+    for body in (
+        {"where": {}, "set": {"seeking_venue": True}},
+        {"where": {"city": "Austin"}, "set": {"seeking_venue": 1}},
+    ):
+        response = client.patch("/api/artists", json=body, headers=token)
+        assert response.status_code == 400
@@ -0,0 +1,28 @@
+from bench import cases
+
+VALUES = {
+    "venue_id": 1,
+    "artist_id": 2,
+    "show_id": 3,
+    "table": "shows",
+    "format": "jsonl",
+    "state": "TX",
+    "genre": "Jazz",
+    "term": "Blue",
+}
+
+
+def paths(found):
+    return {name: path for name, method, path, data in found}
+
+
+def test_nearby_is_benchmarked_around_the_sample_venue(app):
+    found, uncovered = cases(app, {**VALUES, "lat": 30.25, "lon": -97.75})
+    path = paths(found)["GET /venues/nearby"]
+    assert path.startswith("/venues/nearby?")
+    assert "lat=30.25" in path and "lon=-97.75" in path
+    assert "/venues/nearby" not in uncovered
+
+    found, uncovered = cases(app, VALUES)
+    assert "GET /venues/nearby" not in paths(found)
+    assert "/venues/nearby" in uncovered
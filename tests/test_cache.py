@@ -0,0 +1,24 @@
+import pytest
+import cache
+
+
+def counts():
+    stats = cache.stats()
+    return stats["hits"], stats["misses"]
+
+
+def test_data_version_stays_out_of_the_stats(app):
+    before = counts()
+    cache.data_version()
+    cache.data_version()
+    assert counts() == before
+
+
+def test_lru_backend_refuses_several_workers(app, monkeypatch):
+    monkeypatch.setitem(app.config, "WORKERS", 4)
+    try:
+        with pytest.raises(RuntimeError, match="redis"):
+            cache.init_app(app)
+    finally:
+        monkeypatch.setitem(app.config, "WORKERS", 1)
+        cache.init_app(app)
@@ -0,0 +1,45 @@
+import threading
+from datetime import datetime, timedelta
+from models import db, Venue, Artist, ShowCounterState
+import cache
+import counters
+
+
+def test_rollover_moves_counts_and_invalidates(make_venues, make_artists, make_show):
+    (venue,), (artist,) = make_venues(1), make_artists(1)
+    soon = datetime.now() + timedelta(minutes=5)
+    make_show(venue, artist, soon)
+    cache.set(cache.venue_key(venue.id), {"stale": True})
+    cache.set(cache.artist_key(artist.id), {"stale": True})
+    version = cache.data_version()
+
+    assert counters.rollover(now=soon + timedelta(minutes=1)) == 1
+
+    for model, id in ((Venue, venue.id), (Artist, artist.id)):
+        row = db.session.get(model, id)
+        db.session.refresh(row)
+        assert (row.upcoming_shows_count, row.past_shows_count) == (0, 1)
+    assert cache.get(cache.venue_key(venue.id)) is None
+    assert cache.get(cache.artist_key(artist.id)) is None
+    assert cache.data_version() != version
+    assert counters.check() == []
+
+
+def test_racing_get_state_makes_one_row(app, database):
+    first = counters.get_state()  # inserted; not committed yet
+    seen = []
+
+    def other_worker():
+        with app.app_context():
+            # Waits on the uncommitted row's key, then reads it.
+            seen.append(counters.get_state().rolled_over_at)
+            db.session.commit()
+
+    worker = threading.Thread(target=other_worker)
+    worker.start()
+    worker.join(0.5)
+    assert worker.is_alive()
+    db.session.commit()
+    worker.join(5)
+    assert seen == [first.rolled_over_at]
+    assert db.session.query(ShowCounterState).count() == 1
@@ -0,0 +1,64 @@
+import csv
+import gzip
+import io
+import re
+import pytest
+import exporter
+
+TOKEN = {"Authorization": "Bearer secret"}
+
+
+def csv_ids(data):
+    rows = list(csv.reader(io.StringIO(data.decode())))
+    assert rows[0][0] == "id" and "id" not in [row[0] for row in rows[1:]]
+    return [int(row[0]) for row in rows[1:]]
+
+
+def test_download_streams_every_row(app, client, monkeypatch, make_venues):
+    monkeypatch.setitem(app.config, "API_TOKEN", "secret")
+    monkeypatch.setitem(app.config, "EXPORT_FETCH_SIZE", 2)
+    ids = [venue.id for venue in make_venues(5)]
+
+    response = client.get("/export/venues.csv", headers=TOKEN)
+    assert csv_ids(response.data) == ids
+    response = client.get("/export/venues.csv?gzip=1", headers=TOKEN)
+    assert csv_ids(gzip.decompress(response.data)) == ids
+    response = client.get(f"/export/venues.jsonl?after_id={ids[2]}", headers=TOKEN)
+    assert response.data.count(b"\n") == 2
+    # Resumed: appended to the first part, so no second header.
+    response = client.get(f"/export/venues.csv?after_id={ids[2]}", headers=TOKEN)
+    assert response.data.splitlines()[0].startswith(f"{ids[3]},".encode())
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_interrupted_cli_export_resumes_where_it_stopped(
+    app, monkeypatch, make_venues, tmp_path, compress
+):
+    ids = [venue.id for venue in make_venues(5)]
+    path = tmp_path / "venues.csv"
+    batches = exporter.export_batches
+
+    def interrupted(*args):
+        first = batches(*args)
+        yield next(first)
+        yield next(first)
+        raise KeyboardInterrupt
+
+    def export(*args):
+        options = ["--gzip"] if compress else []
+        return app.test_cli_runner().invoke(
+            args=["export", "venues", "--format", "csv", "--fetch-size", "2"]
+            + options
+            + ["-o", str(path), *args]
+        )
+
+    monkeypatch.setattr(exporter, "export_batches", interrupted)
+    result = export()
+    assert result.exit_code != 0
+    after_id = re.search(r"--after-id (\d+)", result.output).group(1)
+    assert int(after_id) == ids[3]
+
+    monkeypatch.setattr(exporter, "export_batches", batches)
+    assert export("--after-id", after_id).exit_code == 0
+    data = path.read_bytes()
+    assert csv_ids(gzip.decompress(data) if compress else data) == ids
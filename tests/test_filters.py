@@ -0,0 +1,42 @@
+from datetime import datetime
+import babel.dates
+import pytest
+from views import datetime_filter
+
+SHOW_TIMES = [datetime(2031, 5, day, hour, 30) for day in (1, 2) for hour in (9, 21)]
+
+
+def test_datetime_filter_matches_babel():
+    format_datetime = datetime_filter(2)
+    for format, pattern in (
+        ("full", "EEEE MMMM, d, y 'at' h:mma"),
+        ("medium", "EE MM, dd, y h:mma"),
+        ("yyyy-MM-dd HH:mm", "yyyy-MM-dd HH:mm"),
+    ):
+        # Twice over a cache smaller than the inputs: hits and evictions.
+        for value in SHOW_TIMES * 2:
+            expected = babel.dates.format_datetime(value, pattern, locale="en")
+            assert format_datetime(value, format) == expected
+
+
+def test_datetime_filter_parses_strings():
+    format_datetime = datetime_filter(16)
+    assert format_datetime("2031-05-01 21:30:00") == format_datetime(SHOW_TIMES[1])
+    assert format_datetime(SHOW_TIMES[1], "full") == "Thursday May, 1, 2031 at 9:30PM"
+
+
+@pytest.mark.parametrize("path", ["/venues", "/artists"])
+def test_listing_genre_filter(client, make_venues, make_artists, path):
+    make = make_venues if path == "/venues" else make_artists
+    make(1, name="Blue Note", genres=["Jazz", "Blues"])
+    make(1, name="Loud Room", genres=["Rock_n_Roll"])
+
+    response = client.get(path, query_string={"genre": "Jazz"})
+    assert response.status_code == 200
+    assert b"Blue Note" in response.data and b"Loud Room" not in response.data
+
+    # Empty means no filter; an unknown genre is the client's mistake.
+    response = client.get(path, query_string={"genre": ""})
+    assert response.status_code == 200
+    assert b"Blue Note" in response.data and b"Loud Room" in response.data
+    assert client.get(path, query_string={"genre": "Bogus"}).status_code == 400
@@ -0,0 +1,90 @@
+import math
+import pytest
+import geo
+
+
+def destination(latitude, longitude, bearing, km):
+    """The point `km` from the start along the initial `bearing` (degrees)."""
+    phi, lam = math.radians(latitude), math.radians(longitude)
+    theta, delta = math.radians(bearing), km / geo.EARTH_RADIUS_KM
+    phi2 = math.asin(
+        math.sin(phi) * math.cos(delta)
+        + math.cos(phi) * math.sin(delta) * math.cos(theta)
+    )
+    lam2 = lam + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi),
+        math.cos(delta) - math.sin(phi) * math.sin(phi2),
+    )
+    return math.degrees(phi2), (math.degrees(lam2) + 540) % 360 - 180
+
+
+@pytest.mark.parametrize(
+    "latitude, longitude, radius_km",
+    [
+        (30.2672, -97.7431, 10),
+        # On the edges of the coarsest cells, and just beside them.
+        (0.0, 0.0, 1),
+        (45.0, -90.0, 25),
+        (-1e-9, 1e-9, 5),
+        # Across the antimeridian.
+        (0.0, 179.999, 5),
+        (-16.5, -179.99, 50),
+        (65.0, 180.0, 100),
+        # Around the poles.
+        (89.99, 0.0, 5),
+        (-89.95, 120.0, 20),
+        (88.0, -45.0, 300),
+    ],
+)
+def test_cells_cover_the_whole_circle(latitude, longitude, radius_km):
+    cells = geo.covering_cells(latitude, longitude, radius_km)
+    assert cells is not None and len(cells) <= geo.MAX_CELLS
+    for km in (0, radius_km / 2, radius_km * 0.999):
+        for bearing in range(0, 360, 5):
+            point = destination(latitude, longitude, bearing, km)
+            code = geo.encode(*point)
+            assert any(code.startswith(cell) for cell in cells), (point, cells)
+
+
+def test_small_radius_uses_fine_cells():
+    cells = geo.covering_cells(30.2672, -97.7431, 0.5)
+    assert min(len(cell) for cell in cells) >= 5
+
+
+def test_whole_earth_needs_too_many_cells():
+    assert geo.covering_cells(0.0, 0.0, 20000) is None
+
+
+def test_distance():
+    assert geo.distance_km(0, 0, 0, 0) == 0
+    assert geo.distance_km(0, 179.99, 0, -179.99) == pytest.approx(2.22, abs=0.01)
+    assert geo.distance_km(90, 0, -90, 0) == pytest.approx(
+        math.pi * geo.EARTH_RADIUS_KM
+    )
+
+
+def located(latitude, longitude):
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "geohash": geo.encode(latitude, longitude),
+    }
+
+
+def test_nearby_finds_venues_across_the_antimeridian(make_venues):
+    (east,) = make_venues(1, **located(0.0, 179.99))
+    (west,) = make_venues(1, **located(0.0, -179.99))
+    make_venues(1, **located(0.0, 179.5))
+    make_venues(1, city="Nowhere", latitude=None, longitude=None, geohash=None)
+    hits = geo.nearby(0.0, 179.995, 5, limit=10)
+    assert [venue.id for distance, venue in hits] == [east.id, west.id]
+    assert hits[0][0] < hits[1][0] <= 5
+    assert len(geo.nearby(0.0, 179.995, 5, limit=1)) == 1
+
+
+def test_nearby_scans_everything_when_the_circle_is_huge(make_venues):
+    venues = make_venues(2, **located(51.5, -0.12))
+    make_venues(1, **located(-33.9, 151.2))
+    hits = geo.nearby(51.5, -0.12, 20000, limit=10)
+    assert len(hits) == 3
+    assert {venue.id for distance, venue in hits[:2]} == {v.id for v in venues}
@@ -0,0 +1,69 @@
+import json
+import random
+from datetime import datetime
+from models import db, Venue, Show
+from seed import Generator
+
+
+def run_import(app, *args):
+    result = app.test_cli_runner().invoke(args=["import", *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def rejected(path):
+    with open(path) as f:
+        return {row["line"]: row["error"] for row in map(json.loads, f)}
+
+
+def test_venue_import_rejects_bad_lines_and_keeps_going(app, database, tmp_path):
+    generator = Generator(random.Random(1), 1.1)
+    good = [generator.venue(i) for i in range(3)]
+    source, rejects = tmp_path / "venues.jsonl", tmp_path / "rejects.jsonl"
+    source.write_text(
+        "\n".join(
+            [
+                json.dumps(good[0]),
+                "[1, 2]",
+                '"x"',
+                "{not json",
+                json.dumps({**good[1], "phone": "12"}),
+                json.dumps(good[2]),
+            ]
+        )
+    )
+    output = run_import(
+        app, "venues", str(source), "--batch-size", "2", "--rejects", str(rejects)
+    )
+
+    assert "2 venues imported, 4 rejected" in output
+    errors = rejected(rejects)
+    assert sorted(errors) == [2, 3, 4, 5]
+    assert errors[2].startswith("not a JSON object")
+    assert errors[4].startswith("invalid JSON")
+    assert errors[5].startswith("phone")
+    names = {name for name, in db.session.query(Venue.name)}
+    assert names == {good[0]["name"], good[2]["name"]}
+
+
+def test_show_import_checks_references_and_counts(
+    app, make_venues, make_artists, tmp_path
+):
+    (venue,), (artist,) = make_venues(1), make_artists(1)
+    source, rejects = tmp_path / "shows.csv", tmp_path / "rejects.jsonl"
+    source.write_text(
+        "venue_id,artist_id,start_time,end_time\n"
+        f"{venue.id},{artist.id},2031-05-01T20:00:00,\n"
+        f"{venue.id + 100},{artist.id},2031-05-02T20:00:00,\n"
+        f"{venue.id},{artist.id},2031-05-01T21:00:00,2031-05-01T23:00:00\n"
+    )
+    output = run_import(app, "shows", str(source), "--rejects", str(rejects))
+
+    assert "1 shows imported, 2 rejected" in output
+    errors = rejected(rejects)
+    assert errors[3] == f"venue_id: unknown venue {venue.id + 100}"
+    assert "conflicting key" in errors[4]  # the exclusion constraint
+    show = db.session.query(Show).one()
+    assert show.end_time == datetime(2031, 5, 1, 23)
+    db.session.refresh(venue)
+    assert venue.upcoming_shows_count == 1
@@ -0,0 +1,50 @@
+import importlib
+import pytest
+import asyncdb
+import cache
+import config
+
+
+@pytest.mark.parametrize(
+    "path", ["/metrics", "/internal/cache", "/internal/fragments", "/internal/pool"]
+)
+def test_operational_pages_need_the_token(app, client, monkeypatch, path):
+    monkeypatch.setitem(app.config, "API_TOKEN", "secret")
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer nope"}).status_code == 401
+    response = client.get(path, headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+
+
+def test_slow_query_log_can_be_disabled_from_the_environment(monkeypatch):
+    try:
+        for value in ("", "none", "None"):
+            monkeypatch.setenv("SLOW_QUERY_THRESHOLD_MS", value)
+            assert importlib.reload(config).SLOW_QUERY_THRESHOLD_MS is None
+        monkeypatch.setenv("SLOW_QUERY_THRESHOLD_MS", "250")
+        assert importlib.reload(config).SLOW_QUERY_THRESHOLD_MS == 250.0
+    finally:
+        monkeypatch.delenv("SLOW_QUERY_THRESHOLD_MS")
+        importlib.reload(config)
+
+
+def test_rejected_csrf_token_is_a_bad_request(app, client, monkeypatch):
+    # CSRF's before_request hook refuses it before the timer starts.
+    monkeypatch.setitem(app.config, "WTF_CSRF_ENABLED", True)
+    response = client.post("/venues/create", data={"name": "Blue Moon"})
+    assert response.status_code == 400
+    assert "Server-Timing" not in response.headers
+
+
+def test_async_reads_count_against_the_request(
+    app, client, monkeypatch, make_venues, query_count
+):
+    pytest.importorskip("asyncpg")
+    (venue,) = make_venues(1)
+    path = f"/venues/{venue.id}"
+    sync = query_count(client.get(path))
+    cache.invalidate(venue_ids=[venue.id])
+    reader = asyncdb.AsyncReader(app.config["SQLALCHEMY_DATABASE_URI"], 2, 0)
+    monkeypatch.setitem(app.extensions, "async_reads", reader)
+    assert query_count(client.get(path)) == sync > 1
+    assert reader.pid is not None  # they did run on the async engine
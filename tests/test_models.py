@@ -0,0 +1,20 @@
+from datetime import datetime
+import pytest
+from sqlalchemy.exc import IntegrityError
+from availability import month_start
+from models import db
+import partitions
+
+
+@pytest.mark.parametrize("monthly", [False, True])
+def test_shows_cannot_outlast_the_maximum(
+    make_venues, make_artists, make_show, monthly
+):
+    start = datetime(2031, 5, 1, 20)
+    if monthly:
+        partitions.create(month_start(start))
+        db.session.commit()
+    (venue,), (artist,) = make_venues(1), make_artists(1)
+    make_show(venue, artist, start, hours=24)
+    with pytest.raises(IntegrityError, match="shows_max_length"):
+        make_show(venue, artist, datetime(2031, 5, 3, 20), hours=25)
@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import text
+from availability import month_start
+from models import db, Venue, Show
+import counters
+import partitions
+
+
+@pytest.fixture
+def archive_schema(database):
+    # drop_all() between tests leaves other schemas alone.
+    yield
+    db.session.rollback()
+    db.session.execute(text("DROP SCHEMA IF EXISTS archive CASCADE"))
+    db.session.commit()
+
+
+def archive(app, *args):
+    result = app.test_cli_runner().invoke(args=["partitions", "archive", *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def archived(table):
+    return db.session.execute(text(f"SELECT count(*) FROM archive.{table}")).scalar()
+
+
+def test_archive_takes_old_default_rows_and_rearchives_months(
+    app, archive_schema, make_venues, make_artists, make_show
+):
+    old = month_start(month_start(datetime.now()) - timedelta(days=60))
+    name = partitions.partition_name(old)
+    (venue,), artists = make_venues(1), make_artists(3)
+
+    partitions.create(old)
+    db.session.commit()
+    make_show(venue, artists[0], old + timedelta(days=1))
+    # Older still, with no partition of its own.
+    make_show(venue, artists[1], old - timedelta(days=40))
+    output = archive(app, "--keep", "1")
+    assert "1 partitions" in output and "1 older shows archived" in output
+    assert (archived(name), archived("shows_default")) == (1, 1)
+
+    # The month gets a partition and a show again, and is archived again.
+    partitions.create(old)
+    db.session.commit()
+    make_show(venue, artists[2], old + timedelta(days=2))
+    archive(app, "--keep", "1")
+    assert archived(name) == 2
+
+    assert db.session.query(Show).count() == 0
+    db.session.expire_all()
+    venue = db.session.get(Venue, venue.id)
+    assert (venue.upcoming_shows_count, venue.past_shows_count) == (0, 0)
+    assert counters.check() == []
@@ -0,0 +1,104 @@
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from availability import month_start
+from models import db, Artist, Show
+import partitions
+import queries
+
+
+def plan_nodes(statement):
+    """Every node of `statement`'s plan, as EXPLAIN (FORMAT JSON) gives them."""
+    compiled = statement.compile(dialect=db.engine.dialect)
+    plan = (
+        db.session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        .scalar()
+    )
+    nodes, found = [plan[0]["Plan"]], []
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", ()))
+        found.append(node)
+    return found
+
+
+def test_detail_show_query_scans_the_venue_index(make_venues, make_artists, make_show):
+    now = datetime.now()
+    this_month = month_start(now)
+    for month in (month_start(this_month - timedelta(days=1)), this_month):
+        partitions.create(month)
+    db.session.commit()
+    (venue,), artists = make_venues(1), make_artists(2)
+    make_show(venue, artists[0], now - timedelta(days=1))
+    make_show(venue, artists[1], now + timedelta(hours=1))
+
+    # Tiny tables would be read sequentially and sorted anyway; ask for the
+    # best plan reading shows in start_time order instead, which needs the
+    # (venue_id, start_time) index of every partition.
+    for setting in ("enable_seqscan", "enable_bitmapscan", "enable_sort"):
+        db.session.execute(text(f"SET LOCAL {setting} = off"))
+    statement = queries.show_statement(
+        Show.venue_id, venue.id, Artist, (Artist.id, Artist.name)
+    )
+    nodes = plan_nodes(statement)
+    assert not [node for node in nodes if node["Node Type"] == "Sort"]
+    shows = [
+        node for node in nodes if node.get("Relation Name", "").startswith("shows")
+    ]
+    assert len(shows) == 3  # both months and the default partition
+    for node in shows:
+        assert node["Node Type"] in ("Index Scan", "Index Only Scan")
+        assert node["Index Name"].endswith("venue_id_start_time_idx")
+
+
+def test_venue_shows_split_at_now(make_venues, make_artists, make_show):
+    (venue,), artists = make_venues(1), make_artists(3)
+    now = datetime.now()
+    for n, artist in enumerate(artists):
+        make_show(venue, artist, now + timedelta(days=n - 1, hours=1))
+
+    details = queries.get_venue(venue.id)
+    assert [show["artist_id"] for show in details["past_shows"]] == [artists[0].id]
+    assert [show["artist_id"] for show in details["upcoming_shows"]] == [
+        artist.id for artist in artists[1:]
+    ]
+    assert (details["past_shows_count"], details["upcoming_shows_count"]) == (1, 2)
+
+
+def test_racing_bookings_across_months_see_each_other(app, make_venues, make_artists):
+    for month in (datetime(2031, 5, 1), datetime(2031, 6, 1)):
+        partitions.create(month)
+    db.session.commit()
+    (venue,), artists = make_venues(1), make_artists(2)
+    # Overlapping shows in different partitions: only the check sees it.
+    first = Show(
+        venue_id=venue.id,
+        artist_id=artists[0].id,
+        start_time=datetime(2031, 5, 31, 22),
+        end_time=datetime(2031, 6, 1, 2),
+    )
+    second = dict(
+        venue_id=venue.id,
+        artist_id=artists[1].id,
+        start_time=datetime(2031, 6, 1, 0),
+        end_time=datetime(2031, 6, 1, 3),
+    )
+    assert queries.booking_conflict(first) is None
+    db.session.add(first)
+    db.session.flush()  # booked, not committed yet
+    seen = []
+
+    def other_booking():
+        with app.app_context():
+            # Waits for the first booking's locks, then sees it.
+            seen.append(queries.booking_conflict(Show(**second)))
+            db.session.rollback()
+
+    worker = threading.Thread(target=other_booking)
+    worker.start()
+    worker.join(0.5)
+    assert worker.is_alive()
+    db.session.commit()
+    worker.join(5)
+    assert seen and seen[0].startswith("The venue is already booked")
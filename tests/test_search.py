@@ -0,0 +1,19 @@
+from models import Venue
+import search
+
+
+def test_search_ranks_pages_and_caps_the_count(make_venues):
+    make_venues(1, name="Blue Moon", city="Austin")
+    make_venues(1, name="The Blue Moon Saloon", city="Austin")
+    make_venues(3, name="Red Room", city="Bluefield")
+    make_venues(2, name="Green Hall", city="Austin")
+
+    first = search.search(Venue, "blue moon", 1, 1, 10)
+    assert [row.name for row in first["rows"]] == ["Blue Moon"]
+    assert first["count"] == 2 and first["has_next"] and not first["has_prev"]
+
+    # City matches count too; the total is capped at count_limit.
+    page = search.search(Venue, "BLUE", 2, 2, 3)
+    assert page["count"] == "3+"
+    assert page["has_prev"] and page["has_next"]
+    assert len(page["rows"]) == 2
@@ -0,0 +1,23 @@
+import cache
+
+FRAGMENT = '{% cache ("test-fragment", name) %}{{ render(name) }}{% endcache %}'
+
+
+def test_fragments_render_again_after_a_write(app):
+    rendered = []
+
+    def render(name):
+        rendered.append(name)
+        return name.upper()
+
+    template = app.jinja_env.from_string(FRAGMENT)
+    with app.app_context():
+        for _ in range(2):
+            assert template.render(name="Blue Moon", render=render) == "BLUE MOON"
+        template.render(name="Red Room", render=render)
+        assert rendered == ["Blue Moon", "Red Room"]
+
+        cache.invalidate()
+        template.render(name="Blue Moon", render=render)
+        template.render(name="Blue Moon", render=render)
+        assert rendered == ["Blue Moon", "Red Room", "Blue Moon"]
@@ -0,0 +1,32 @@
+import pytest
+
+
+def test_venue_areas_take_constant_queries(client, make_venues, query_count):
+    make_venues(3, city="Austin", state="TX")
+    few = query_count(client.get("/venues"))
+    for n in range(20):
+        make_venues(5, city=f"Town {n}", state="CA")
+    response = client.get("/venues")
+    assert response.status_code == 200
+    assert b"Town 19" in response.data
+    assert query_count(response) == few
+
+
+def test_venue_calendar_rejects_utc_offsets(client, make_venues):
+    (venue,) = make_venues(1)
+    path = f"/venues/{venue.id}/calendar"
+    for args in (
+        {"from": "2031-05-01T00:00:00+02:00"},
+        {"from": "2031-05-01", "to": "2031-05-08T00:00:00+00:00"},
+    ):
+        response = client.get(path, query_string=args)
+        assert response.status_code == 400
+        assert "UTC offset" in response.json["error"]
+    response = client.get(path, query_string={"from": "2031-05-01", "to": "2031-05-08"})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("kind", ["venues", "artists"])
+def test_editing_a_missing_listing_is_not_found(client, database, kind):
+    response = client.post(f"/{kind}/0/edit", data={"name": "x", "version": "1"})
+    assert response.status_code == 404
@@ -0,0 +1,141 @@
+"""Partial, version-checked updates of venues and artists.
+
+`update` writes only the given columns in one UPDATE ... RETURNING. The
+statement also matches the version the client last read and bumps it, so
+a concurrent edit surfaces as a `Conflict` instead of being silently
+overwritten. `update_where` is the bulk form: one UPDATE across every
+row matching a set of listing filters, e.g. all venues in a city.
+"""
+
+from sqlalchemy import update as sql_update
+from forms import ArtistForm, VenueForm, GENRE_NAMES, STATE_NAMES
+from importer import form_validators, run_validators
+from models import db, Venue, Artist
+import deletion
+import geo
+
+FORMS = {Venue: VenueForm, Artist: ArtistForm}
+SEEKING = {Venue: "seeking_talent", Artist: "seeking_venue"}
+# Columns shown on the other side's pages (an artist's shows list the
+# venue's name and image), whose change must invalidate those pages too.
+SHOWN_ON_SHOWS = frozenset(("name", "image_link"))
+# Columns a venue's location is derived from (see geo.py).
+LOCATED_BY = frozenset(("city", "state"))
+
+
+class Conflict(Exception):
+    """The row was updated since the client read `version`."""
+
+    def __init__(self, version):
+        super().__init__(f"Version {version} is current.")
+        self.version = version
+
+
+def clean_changes(model, data):
+    """Validated {column: value} from a partial venue/artist document.
+
+    Checks each value's type against its column, then runs the form's
+    validators on the fields present only. Raises ValueError naming the
+    first bad field.
+    """
+    validators = form_validators(FORMS[model])
+    columns = model.__table__.columns
+    unknown = sorted(name for name in data if name not in validators)
+    if unknown or not data:
+        raise ValueError(f"Unknown fields: {', '.join(unknown) or 'none given'}.")
+    for name, value in data.items():
+        if name in columns:
+            check_type(columns[name], value)
+    changes = dict(data)
+    seeking = SEEKING[model]
+    if seeking in changes and not changes[seeking]:
+        changes["seeking_description"] = None
+    if "genres" in changes:
+        if not GENRE_NAMES.issuperset(changes["genres"]):
+            raise ValueError("genres: Invalid genres.")
+    if "state" in changes and changes["state"] not in STATE_NAMES:
+        raise ValueError("state: Invalid state.")
+    run_validators(
+        {name: validators[name] for name in changes if name in validators}, changes
+    )
+    return {name: value for name, value in changes.items() if name in columns}
+
+
+def check_type(column, value):
+    """Raise ValueError unless `value` can be stored in `column` as is."""
+    if value is None:
+        if not column.nullable:
+            raise ValueError(f"{column.key}: must not be null")
+    elif isinstance(column.type, db.ARRAY):
+        if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+            raise ValueError(f"{column.key}: must be a list of strings")
+    elif isinstance(column.type, db.Boolean):
+        if not isinstance(value, bool):
+            raise ValueError(f"{column.key}: must be true or false")
+    elif isinstance(column.type, db.String):
+        if not isinstance(value, str):
+            raise ValueError(f"{column.key}: must be a string")
+
+
+def update(model, id, version, changes):
+    """Apply `changes` if the row is still at `version`.
+
+    Returns the updated row as a mapping, None if there is no such row.
+    Raises Conflict if someone else updated it first.
+    """
+    table = model.__table__
+    row = db.session.execute(
+        sql_update(table)
+        .where(
+            table.c.id == id,
+            table.c.version == version,
+            table.c.deleted_at.is_(None),
+        )
+        .values(**changes, version=table.c.version + 1)
+        .returning(*table.c)
+    ).first()
+    if row is None:
+        current = db.session.query(model.version).filter(model.id == id).scalar()
+        db.session.rollback()
+        if current is None:
+            return None
+        raise Conflict(current)
+    relocate(model, [id], changes)
+    db.session.commit()
+    invalidate(model, [id], changes)
+    return row._mapping
+
+
+def update_where(model, filters, changes):
+    """Apply `changes` to every row matching `filters` in one statement.
+
+    Returns [(id, new version)] of the rows updated.
+    """
+    table = model.__table__
+    rows = db.session.execute(
+        sql_update(table)
+        .where(*filters, table.c.deleted_at.is_(None))
+        .values(**changes, version=table.c.version + 1)
+        .returning(table.c.id, table.c.version)
+    ).all()
+    relocate(model, [id for id, version in rows], changes)
+    db.session.commit()
+    invalidate(model, [id for id, version in rows], changes)
+    return rows
+
+
+def relocate(model, ids, changes):
+    if model is Venue and ids and not LOCATED_BY.isdisjoint(changes):
+        geo.relocate(ids)
+
+
+def invalidate(model, ids, changes):
+    if not ids:
+        return
+    other_ids = ()
+    if not SHOWN_ON_SHOWS.isdisjoint(changes):
+        key, other = deletion.DEPENDENTS[model]
+        other_ids = [
+            id for id, in db.session.query(other).filter(key.in_(ids)).distinct()
+        ]
+    deletion.invalidate(model, ids, other_ids)
@@ -0,0 +1,708 @@
+"""Fyyur's HTML pages, plus the small JSON endpoints that sit beside them."""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
+import dateutil.parser
+import babel
+import babel.dates
+import sys
+from flask import (
+    Blueprint,
+    Response,
+    abort,
+    current_app,
+    render_template,
+    request,
+    flash,
+    jsonify,
+    redirect,
+    stream_template,
+    url_for,
+)
+from sqlalchemy import tuple_
+from enums import Genre
+from forms import ArtistForm, ShowForm, ValidationError, VenueForm
+from models import db, Venue, Artist, Show
+from stats import upcoming_show_counts
+from queries import (
+    EXCLUSION_VIOLATION,
+    artist_details,
+    booking_conflict,
+    venue_details,
+)
+from facets import facet_query, listing_filters, split_facets
+from dbpool import TimedQueuePool
+from asyncdb import gather
+from auth import token_required
+import availability
+import cache
+import counters
+import deletion
+import geo
+import search
+import templating
+import updates
+
+views = Blueprint("views", __name__)
+
+# ----------------------------------------------------------------------------#
+# Filters.
+# ----------------------------------------------------------------------------#
+
+
+DATETIME_PATTERNS = {
+    "full": babel.dates.parse_pattern("EEEE MMMM, d, y 'at' h:mma"),
+    "medium": babel.dates.parse_pattern("EE MM, dd, y h:mma"),
+}
+DATETIME_LOCALE = babel.Locale.parse("en")
+
+
+def datetime_filter(cache_size):
+    """The `datetime` template filter, caching up to `cache_size` results."""
+
+    @lru_cache(maxsize=cache_size)
+    def format_cached(date, format):
+        pattern = DATETIME_PATTERNS.get(format) or babel.dates.parse_pattern(format)
+        return pattern.apply(date, DATETIME_LOCALE)
+
+    def format_datetime(value, format="medium"):
+        if isinstance(value, str):
+            value = dateutil.parser.parse(value)
+        return format_cached(value, format)
+
+    return format_datetime
+
+
+@views.record_once
+def register_template_helpers(state):
+    state.app.jinja_env.filters["datetime"] = datetime_filter(
+        state.app.config["DATETIME_FORMAT_CACHE_SIZE"]
+    )
+    state.app.jinja_env.globals["genre_labels"] = dict(Genre.choices())
+
+
+# ----------------------------------------------------------------------------#
+# Helpers.
+# ----------------------------------------------------------------------------#
+
+
+def buffered(chunks, size=8192):
+    """Join small template chunks into writes of roughly `size` characters."""
+    buffer, length = [], 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+# ----------------------------------------------------------------------------#
+# Controllers.
+# ----------------------------------------------------------------------------#
+
+
+@views.route("/")
+def index():
+    return render_template("pages/home.html")
+
+
+#  Venues
+#  ----------------------------------------------------------------
+
+
+@views.route("/venues")
+def venues():
+    filters, active = listing_filters(Venue, request.args)
+    venues, facets = gather(
+        db.session.query(Venue)
+        .with_entities(
+            Venue.city,
+            Venue.state,
+            Venue.id,
+            Venue.name,
+            Venue.upcoming_shows_count,
+        )
+        .filter(*filters)
+        .order_by(Venue.city, Venue.state, Venue.id)
+        .statement,
+        facet_query(Venue, filters),
+    )
+    data = []
+    for (city, state), area_venues in groupby(venues, key=itemgetter(0, 1)):
+        data.append(
+            {
+                "city": city,
+                "state": state,
+                "venues": [
+                    {
+                        "id": v.id,
+                        "name": v.name,
+                        "num_upcoming_shows": v.upcoming_shows_count,
+                    }
+                    for v in area_venues
+                ],
+            }
+        )
+    genres, states = split_facets(facets)
+    return render_template(
+        "pages/venues.html",
+        areas=data,
+        facets={"genre": genres, "state": states},
+        active=active,
+    )
+
+
+@views.route("/venues/search", methods=["GET", "POST"])
+def search_venues():
+    keyword = request.values.get("search_term", "")
+    page = max(request.values.get("page", 1, type=int), 1)
+    response = search.search(
+        Venue,
+        keyword,
+        page,
+        current_app.config["SEARCH_PAGE_SIZE"],
+        current_app.config["SEARCH_COUNT_LIMIT"],
+    )
+    counts = upcoming_show_counts(Venue, [v.id for v in response["rows"]])
+    response["data"] = [
+        {"id": v.id, "name": v.name, "num_upcoming_shows": counts[v.id]}
+        for v in response.pop("rows")
+    ]
+    return render_template(
+        "pages/search_venues.html",
+        results=response,
+        search_term=keyword,
+    )
+
+
+@views.route("/venues/<int:venue_id>")
+def show_venue(venue_id):
+    venue = venue_details(venue_id)
+    if venue is None:
+        abort(404)
+    return render_template("pages/show_venue.html", venue=venue)
+
+
+@views.route("/venues/nearby")
+def venues_nearby():
+    try:
+        latitude = float(request.args["lat"])
+        longitude = float(request.args["lon"])
+        radius = float(
+            request.args.get("radius", current_app.config["NEARBY_DEFAULT_RADIUS_KM"])
+        )
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lon are required and must be numbers."}), 400
+    max_radius = current_app.config["NEARBY_MAX_RADIUS_KM"]
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return jsonify({"error": "lat or lon is out of range."}), 400
+    if not 0 < radius <= max_radius:
+        return jsonify({"error": f"radius must be within {max_radius} km."}), 400
+    hits = geo.nearby(
+        latitude, longitude, radius, current_app.config["NEARBY_MAX_RESULTS"]
+    )
+    return jsonify(
+        {
+            "lat": latitude,
+            "lon": longitude,
+            "radius": radius,
+            "venues": [
+                {
+                    "id": venue.id,
+                    "name": venue.name,
+                    "city": venue.city,
+                    "state": venue.state,
+                    "lat": venue.latitude,
+                    "lon": venue.longitude,
+                    "distance": round(distance, 3),
+                }
+                for distance, venue in hits
+            ],
+        }
+    )
+
+
+@views.route("/venues/<int:venue_id>/calendar")
+def venue_calendar(venue_id):
+    if db.session.query(Venue.id).filter_by(id=venue_id).first() is None:
+        return jsonify({"error": "Venue not found."}), 404
+    try:
+        if "from" in request.args:
+            start = datetime.fromisoformat(request.args["from"])
+        else:
+            start = datetime.combine(datetime.today(), datetime.min.time())
+        if "to" in request.args:
+            end = datetime.fromisoformat(request.args["to"])
+        else:
+            end = start + timedelta(days=30)
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO 8601 dates."}), 400
+    # Show times are stored without a zone, so an offset can't be compared.
+    if start.tzinfo is not None or end.tzinfo is not None:
+        return jsonify({"error": "from and to must not have a UTC offset."}), 400
+    max_days = current_app.config["CALENDAR_MAX_DAYS"]
+    if not start < end <= start + timedelta(days=max_days):
+        return (
+            jsonify({"error": f"to must be after from and within {max_days} days."}),
+            400,
+        )
+    busy, free = availability.calendar(venue_id, start, end)
+    return jsonify(
+        {
+            "venue_id": venue_id,
+            "from": start,
+            "to": end,
+            "busy": [{"start": s, "end": e} for s, e in busy],
+            "free": [{"start": s, "end": e} for s, e in free],
+        }
+    )
+
+
+#  Update
+#  ----------------------------------------------------------------
+@views.route("/venues/<int:venue_id>/edit", methods=["GET"])
+def edit_venue(venue_id):
+    venue = db.session.query(Venue).filter_by(id=venue_id).first()
+    form = VenueForm(obj=venue)
+    return render_template("forms/edit_venue.html", form=form, venue=venue)
+
+
+@views.route("/venues/<int:venue_id>/edit", methods=["POST"])
+def edit_venue_submission(venue_id):
+    if db.session.query(Venue.id).filter_by(id=venue_id).first() is None:
+        abort(404)
+    try:
+        form = VenueForm(request.form)
+        if not form.validate():
+            raise ValidationError()
+        if form.seeking_talent.data == False:
+            form.seeking_description.data = None
+        venue = updates.update(
+            Venue,
+            venue_id,
+            request.form.get("version", type=int),
+            {
+                "name": form.name.data,
+                "city": form.city.data,
+                "state": form.state.data,
+                "address": form.address.data,
+                "phone": form.phone.data,
+                "image_link": form.image_link.data,
+                "genres": form.genres.data,
+                "facebook_link": form.facebook_link.data,
+                "website": form.website.data,
+                "seeking_talent": form.seeking_talent.data,
+                "seeking_description": form.seeking_description.data,
+            },
+        )
+        if venue is None:
+            raise LookupError(f"Venue {venue_id} was deleted meanwhile.")
+        flash("Venue " + request.form["name"] + " was successfully updated!")
+    except updates.Conflict:
+        flash(
+            "Venue "
+            + request.form["name"]
+            + " was changed by someone else while you were editing it."
+            " Review the changes and edit it again."
+        )
+    except:
+        db.session.rollback()
+        if form.errors:
+            flash(form.errors)
+        flash(
+            "An error occurred. Venue "
+            + request.form["name"]
+            + " could not be updated."
+        )
+    finally:
+        db.session.close()
+        return redirect(url_for("views.show_venue", venue_id=venue_id))
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+
+@views.route("/venues/create", methods=["GET"])
+def create_venue_form():
+    form = VenueForm()
+    return render_template("forms/new_venue.html", form=form)
+
+
+@views.route("/venues/create", methods=["POST"])
+def create_venue_submission():
+    try:
+        form = VenueForm(request.form)
+        if form.validate():
+            if form.seeking_talent.data == False:
+                form.seeking_description.data = None
+            venue = Venue(
+                name=form.name.data,
+                city=form.city.data,
+                state=form.state.data,
+                address=form.address.data,
+                phone=form.phone.data,
+                image_link=form.image_link.data,
+                genres=form.genres.data,
+                facebook_link=form.facebook_link.data,
+                website=form.website.data,
+                seeking_talent=form.seeking_talent.data,
+                seeking_description=form.seeking_description.data,
+                **geo.location(form.city.data, form.state.data),
+            )
+        db.session.add(venue)
+        db.session.commit()
+        cache.invalidate()
+        flash("Venue " + request.form["name"] + " was successfully listed!")
+    except Exception as e:
+        print(e)
+        print(f"form error:{form.errors}")
+        print(sys.exc_info())
+        db.session.rollback()
+        if form.errors:
+            flash(form.errors)
+        flash(
+            "An error occurred. Venue " + request.form["name"] + " could not be listed."
+        )
+    finally:
+        db.session.close()
+        return render_template("pages/home.html")
+
+
+@views.route("/venues/<int:venue_id>/delete", methods=["POST"])
+def delete_venue(venue_id):
+    try:
+        if deletion.delete(Venue, venue_id):
+            flash("Venue successfully deleted.")
+        else:
+            flash("Venue not found.")
+    except:
+        db.session.rollback()
+        flash("An error occurred. Venue could not be deleted.")
+    finally:
+        db.session.close()
+        return redirect(url_for("views.index"))
+
+
+#  Artists
+#  ----------------------------------------------------------------
+@views.route("/artists")
+def artists():
+    filters, active = listing_filters(Artist, request.args)
+    data, facets = gather(
+        db.session.query(Artist)
+        .with_entities(Artist.id, Artist.name)
+        .filter(*filters)
+        .statement,
+        facet_query(Artist, filters),
+    )
+    genres, states = split_facets(facets)
+    return render_template(
+        "pages/artists.html",
+        artists=data,
+        facets={"genre": genres, "state": states},
+        active=active,
+    )
+
+
+@views.route("/artists/search", methods=["GET", "POST"])
+def search_artists():
+    keyword = request.values.get("search_term", "")
+    page = max(request.values.get("page", 1, type=int), 1)
+    response = search.search(
+        Artist,
+        keyword,
+        page,
+        current_app.config["SEARCH_PAGE_SIZE"],
+        current_app.config["SEARCH_COUNT_LIMIT"],
+    )
+    counts = upcoming_show_counts(Artist, [a.id for a in response["rows"]])
+    response["data"] = [
+        {"id": a.id, "name": a.name, "num_upcoming_shows": counts[a.id]}
+        for a in response.pop("rows")
+    ]
+    return render_template(
+        "pages/search_artists.html",
+        results=response,
+        search_term=keyword,
+    )
+
+
+@views.route("/artists/<int:artist_id>")
+def show_artist(artist_id):
+    artist = artist_details(artist_id)
+    if artist is None:
+        abort(404)
+    return render_template("pages/show_artist.html", artist=artist)
+
+
+#  Update
+#  ----------------------------------------------------------------
+@views.route("/artists/<int:artist_id>/edit", methods=["GET"])
+def edit_artist(artist_id):
+    artist = db.session.query(Artist).filter_by(id=artist_id).first()
+    form = ArtistForm(obj=artist)
+    return render_template("forms/edit_artist.html", form=form, artist=artist)
+
+
+@views.route("/artists/<int:artist_id>/edit", methods=["POST"])
+def edit_artist_submission(artist_id):
+    if db.session.query(Artist.id).filter_by(id=artist_id).first() is None:
+        abort(404)
+    try:
+        form = ArtistForm(request.form)
+        if not form.validate():
+            raise ValidationError()
+        if form.seeking_venue.data == False:
+            form.seeking_description.data = None
+        artist = updates.update(
+            Artist,
+            artist_id,
+            request.form.get("version", type=int),
+            {
+                "name": form.name.data,
+                "city": form.city.data,
+                "state": form.state.data,
+                "phone": form.phone.data,
+                "image_link": form.image_link.data,
+                "genres": form.genres.data,
+                "facebook_link": form.facebook_link.data,
+                "website": form.website.data,
+                "seeking_venue": form.seeking_venue.data,
+                "seeking_description": form.seeking_description.data,
+            },
+        )
+        if artist is None:
+            raise LookupError(f"Artist {artist_id} was deleted meanwhile.")
+        flash("Artist " + request.form["name"] + " was successfully updated!")
+    except updates.Conflict:
+        flash(
+            "Artist "
+            + request.form["name"]
+            + " was changed by someone else while you were editing it."
+            " Review the changes and edit it again."
+        )
+    except:
+        db.session.rollback()
+        if form.errors:
+            flash(form.errors)
+        flash(
+            "An error occurred. Artist "
+            + request.form["name"]
+            + " could not be updated."
+        )
+    finally:
+        db.session.close()
+
+    return redirect(url_for("views.show_artist", artist_id=artist_id))
+
+
+@views.route("/artists/<int:artist_id>/delete", methods=["POST"])
+def delete_artist(artist_id):
+    try:
+        if deletion.delete(Artist, artist_id):
+            flash("Artist successfully deleted.")
+        else:
+            flash("Artist not found.")
+    except:
+        db.session.rollback()
+        flash("An error occurred. Artist could not be deleted.")
+    finally:
+        db.session.close()
+        return redirect(url_for("views.index"))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+
+@views.route("/artists/create", methods=["GET"])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template("forms/new_artist.html", form=form)
+
+
+@views.route("/artists/create", methods=["POST"])
+def create_artist_submission():
+    try:
+        form = ArtistForm(request.form)
+        if form.validate():
+            if form.seeking_venue.data == False:
+                form.seeking_description.data = None
+
+            artist = Artist(
+                name=form.name.data,
+                city=form.city.data,
+                state=form.state.data,
+                phone=form.phone.data,
+                image_link=form.image_link.data,
+                genres=form.genres.data,
+                facebook_link=form.facebook_link.data,
+                website=form.website.data,
+                seeking_venue=form.seeking_venue.data,
+                seeking_description=form.seeking_description.data,
+            )
+        db.session.add(artist)
+        db.session.commit()
+        cache.invalidate()
+        flash("Artist " + request.form["name"] + " was successfully listed!")
+    except:
+        db.session.rollback()
+        if form.errors:
+            flash(form.errors)
+        flash(
+            "An error occurred. Artist "
+            + request.form["name"]
+            + " could not be listed."
+        )
+    finally:
+        db.session.close()
+        return render_template("pages/home.html")
+
+
+#  Shows
+#  ----------------------------------------------------------------
+
+
+@views.route("/shows")
+def shows():
+    limit = request.args.get("limit", current_app.config["SHOWS_PAGE_SIZE"], type=int)
+    limit = max(1, min(limit, current_app.config["SHOWS_MAX_PAGE_SIZE"]))
+    query = (
+        db.session.query(Show)
+        .join(Venue)
+        .join(Artist)
+        .with_entities(
+            Venue.id,
+            Venue.name,
+            Artist.id,
+            Artist.name,
+            Artist.image_link,
+            Show.start_time,
+            Show.id,
+        )
+    )
+    if "after" in request.args:
+        try:
+            after = datetime.fromisoformat(request.args["after"])
+            after_id = int(request.args["after_id"])
+        except (KeyError, ValueError):
+            abort(400)
+        query = query.filter(tuple_(Show.start_time, Show.id) > tuple_(after, after_id))
+    query = query.order_by(Show.start_time, Show.id).limit(limit + 1)
+    # Filled in while the page streams; the template reads it after the list.
+    page = {"next": None}
+
+    def generate():
+        last = None
+        for n, show in enumerate(
+            query.yield_per(current_app.config["SHOWS_FETCH_SIZE"])
+        ):
+            if n == limit:
+                page["next"] = {
+                    "after": last[5].isoformat(),
+                    "after_id": last[6],
+                    "limit": limit,
+                }
+                break
+            last = show
+            yield {
+                "venue_id": show[0],
+                "venue_name": show[1],
+                "artist_id": show[2],
+                "artist_name": show[3],
+                "artist_image_link": show[4],
+                "start_time": show[5],
+            }
+
+    return Response(
+        buffered(stream_template("pages/shows.html", shows=generate(), page=page))
+    )
+
+
+@views.route("/shows/create")
+def create_shows():
+    try:
+        # renders form. do not touch.
+        form = ShowForm()
+    except:
+        db.session.rollback()
+    finally:
+        return render_template("forms/new_show.html", form=form)
+
+
+@views.route("/shows/create", methods=["POST"])
+def create_show_submission():
+    form = ShowForm(request.form)
+    template = "pages/home.html"
+    try:
+        if not form.validate():
+            raise ValidationError()
+        show = Show(
+            artist_id=int(form.artist_id.data),
+            venue_id=int(form.venue_id.data),
+            start_time=form.start_time.data,
+            end_time=form.end_time.data,
+        )
+        conflict = booking_conflict(show)
+        if conflict:
+            form.start_time.errors.append(conflict)
+            raise ValidationError()
+        db.session.add(show)
+        counters.record_show(show)
+        db.session.commit()
+        cache.invalidate(venue_ids=[show.venue_id], artist_ids=[show.artist_id])
+        availability.invalidate([(show.venue_id, show.start_time, show.end_time)])
+        flash("Show was successfully listed!")
+    except Exception as e:
+        db.session.rollback()
+        if getattr(getattr(e, "orig", None), "pgcode", None) == EXCLUSION_VIOLATION:
+            # Booked concurrently, after booking_conflict looked.
+            form.start_time.errors.append("The venue or artist is already booked.")
+        if form.errors:
+            template = "forms/new_show.html"
+        else:
+            flash("An error occurred. Show could not be listed. Check id provided.")
+    finally:
+        db.session.close()
+        return render_template(template, form=form)
+
+
+#  Internal
+#  ----------------------------------------------------------------
+
+
+@views.route("/internal/cache")
+@token_required
+def cache_stats():
+    return jsonify(cache.stats())
+
+
+@views.route("/internal/fragments")
+@token_required
+def fragment_stats():
+    return jsonify(templating.stats())
+
+
+@views.route("/internal/pool")
+@token_required
+def pool_stats():
+    pool = db.engine.pool
+    if not isinstance(pool, TimedQueuePool):
+        return jsonify({"pool": type(pool).__name__})
+    return jsonify(pool.stats())
+
+
+@views.app_errorhandler(404)
+def not_found_error(error):
+    return render_template("errors/404.html"), 404
+
+
+@views.app_errorhandler(500)
+def server_error(error):
+    return render_template("errors/500.html"), 500